@@ -61,6 +61,10 @@ except PackageError as e:
     logger.error("could not install package. Reason: %s", e.message)
 ```
 
+The system architecture (`dpkg --print-architecture`) is looked up once per process and
+cached. Charm unit tests that mock `check_output` with a list of outputs per test should
+patch `apt._get_system_arch`, or call `apt._get_system_arch.cache_clear()` in their setup.
+
 
 `RepositoryMapping` will return a dict-like object containing enabled system repositories
 and their properties (available groups, baseuri. gpg key). This class can add, disable, or
@@ -102,12 +106,15 @@ if "deb-us.archive.ubuntu.com-xenial" not in repositories:
 
 from __future__ import annotations
 
-import fileinput
+import functools
 import glob
 import logging
 import os
 import re
+import stat
 import subprocess
+import sys
+import tempfile
 import typing
 from enum import Enum
 from subprocess import PIPE, CalledProcessError, check_output
@@ -124,12 +131,27 @@ LIBAPI = 0
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 16
+LIBPATCH = 17
 
 
 VALID_SOURCE_TYPES = ("deb", "deb-src")
 OPTIONS_MATCHER = re.compile(r"\[.*?\]")
+# One-line-style source: `type [options] uri release [groups...]`
+SOURCE_LINE_MATCHER = re.compile(
+    r"""
+    ^\s*(?P<repotype>\S+)\s+
+    (?:\[(?P<options>[^\]]*)\]\s*)?
+    (?P<uri>\S+)\s+
+    (?P<release>\S+)
+    (?P<groups>(?:\s+\S+)*)\s*$
+    """,
+    re.VERBOSE,
+)
+# from gnupg2 docs: fpr :: Fingerprint (fingerprint is in field 10)
+_FINGERPRINT_MATCHER = re.compile(r"^fpr:{9}([0-9A-F]{40}):$", re.MULTILINE)
 _GPG_KEY_DIR = "/etc/apt/trusted.gpg.d/"
+# Keep the installed version of changed configuration files rather than prompting.
+_INSTALL_OPTARGS = ("--option=Dpkg::Options::=--force-confold",)
 
 
 class Error(Exception):
@@ -167,6 +189,39 @@ class PackageState(Enum):
     Available = "available"
 
 
+@functools.lru_cache(maxsize=None)
+def _get_system_arch() -> str:
+    """Return the output of `dpkg --print-architecture`, which cannot change at runtime.
+
+    The result is cached for the lifetime of the process. Unit tests that mock
+    `check_output` should patch `_get_system_arch` as well, or call
+    `_get_system_arch.cache_clear()` in their setup, so that the architecture lookup
+    doesn't consume, or get answered by, another test's mocked output.
+    """
+    return check_output(["dpkg", "--print-architecture"], universal_newlines=True).strip()
+
+
+def _iter_apt_cache_records(lines: Iterable[str]) -> Iterator[dict[str, str]]:
+    """Yield the package, architecture and version of each `apt-cache show` record.
+
+    Records are separated by blank lines, and are yielded as soon as they have been read,
+    so callers looking for a single match can stop early.
+    """
+    keys = ("Package", "Architecture", "Version")
+    record: dict[str, str] = {}
+    for line in lines:
+        if not line.strip():
+            if record:
+                yield record
+                record = {}
+            continue
+        key, _, value = line.partition(":")
+        if key in keys:
+            record[key] = value.strip()
+    if record:
+        yield record
+
+
 class DebianPackage:
     """Represents a traditional Debian package and its utility functions.
 
@@ -190,13 +245,17 @@ class DebianPackage:
     (though it operates essentially the same as `Available`).
     """
 
+    __slots__ = ("_arch", "_fullversion", "_name", "_state", "_version")
+
     def __init__(
-        self, name: str, version: str, epoch: str, arch: str, state: PackageState
+        self, name: str, version: str, epoch: str | None, arch: str, state: PackageState
     ) -> None:
         self._name = name
-        self._arch = arch
+        # A handful of architectures are shared by every package.
+        self._arch = sys.intern(arch)
         self._state = state
         self._version = Version(version, epoch)
+        self._fullversion: str | None = None
 
     def __eq__(self, other: object) -> bool:
         """Equality for comparison.
@@ -218,7 +277,9 @@ class DebianPackage:
 
     def __repr__(self):
         """Represent the package."""
-        return f"<{self.__module__}.{type(self).__name__}: {self.__dict__}>"
+        # Leave out the lazily filled `_fullversion` cache.
+        attrs = {slot: getattr(self, slot) for slot in self.__slots__ if slot != "_fullversion"}
+        return f"<{self.__module__}.{type(self).__name__}: {attrs}>"
 
     def __str__(self):
         """Return a human-readable representation of the package."""
@@ -257,11 +318,7 @@ class DebianPackage:
 
     def _add(self) -> None:
         """Add a package to the system."""
-        self._apt(
-            "install",
-            f"{self.name}={self.version}",
-            optargs=["--option=Dpkg::Options::=--force-confold"],
-        )
+        self._apt("install", f"{self.name}={self.version}", optargs=list(_INSTALL_OPTARGS))
 
     def _remove(self) -> None:
         """Remove a package from the system. Implementation-specific."""
@@ -337,16 +394,17 @@ class DebianPackage:
     @property
     def fullversion(self) -> str:
         """Returns the name+epoch for a package."""
-        return f"{self._version}.{self._arch}"
+        if self._fullversion is None:
+            self._fullversion = f"{self._version}.{self._arch}"
+        return self._fullversion
 
     @staticmethod
-    def _get_epoch_from_version(version: str) -> tuple[str, str]:
+    def _get_epoch_from_version(version: str) -> tuple[str | None, str]:
         """Pull the epoch, if any, out of a version string."""
-        epoch_matcher = re.compile(r"^((?P<epoch>\d+):)?(?P<version>.*)")
-        result = epoch_matcher.search(version)
-        assert result is not None
-        matches = result.groupdict()
-        return matches.get("epoch", ""), matches["version"]
+        epoch, sep, rest = version.partition(":")
+        if sep and epoch.isdigit():
+            return epoch, rest
+        return None, version
 
     @classmethod
     def from_system(
@@ -393,12 +451,8 @@ class DebianPackage:
             arch: an optional architecture, defaulting to `dpkg --print-architecture`.
                 If an architecture is not specified, this will be used for selection.
         """
-        system_arch = check_output(
-            ["dpkg", "--print-architecture"], universal_newlines=True
-        ).strip()
-        arch = arch if arch else system_arch
+        arch = arch if arch else _get_system_arch()
 
-        # Regexps are a really terrible way to do this. Thanks dpkg
         output = ""
         try:
             output = check_output(["dpkg", "-l", package], stderr=PIPE, universal_newlines=True)
@@ -409,24 +463,14 @@ class DebianPackage:
         # omit it`
         lines = str(output).splitlines()[5:]
 
-        dpkg_matcher = re.compile(
-            r"""
-        ^(?P<package_status>\w+?)\s+
-        (?P<package_name>.*?)(?P<throwaway_arch>:\w+?)?\s+
-        (?P<version>.*?)\s+
-        (?P<arch>\w+?)\s+
-        (?P<description>.*)
-        """,
-            re.VERBOSE,
-        )
-
         for line in lines:
-            result = dpkg_matcher.search(line)
-            if result is None:
-                logger.warning("dpkg matcher could not parse line: %s", line)
+            # Columns are status, name[:arch], version, architecture and description.
+            # Only the description may contain whitespace.
+            fields = line.split(maxsplit=4)
+            if len(fields) < 4:
+                logger.warning("could not parse dpkg output line: %s", line)
                 continue
-            matches = result.groupdict()
-            package_status = matches["package_status"]
+            package_status, package_name, package_version, package_arch = fields[:4]
 
             if not package_status.endswith("i"):
                 logger.debug(
@@ -436,12 +480,12 @@ class DebianPackage:
                 )
                 break
 
-            epoch, split_version = DebianPackage._get_epoch_from_version(matches["version"])
+            epoch, split_version = DebianPackage._get_epoch_from_version(package_version)
             pkg = DebianPackage(
-                name=matches["package_name"],
+                name=package_name.partition(":")[0],
                 version=split_version,
                 epoch=epoch,
-                arch=matches["arch"],
+                arch=package_arch,
                 state=PackageState.Present,
             )
             if (pkg.arch == "all" or pkg.arch == arch) and (
@@ -464,13 +508,7 @@ class DebianPackage:
             arch: an optional architecture, defaulting to `dpkg --print-architecture`.
                 If an architecture is not specified, this will be used for selection.
         """
-        system_arch = check_output(
-            ["dpkg", "--print-architecture"], universal_newlines=True
-        ).strip()
-        arch = arch if arch else system_arch
-
-        # Regexps are a really terrible way to do this. Thanks dpkg
-        keys = ("Package", "Architecture", "Version")
+        arch = arch if arch else _get_system_arch()
 
         try:
             output = check_output(
@@ -479,19 +517,7 @@ class DebianPackage:
         except CalledProcessError as e:
             raise PackageError(f"Could not list packages in apt-cache: {e.stderr}") from None
 
-        pkg_groups = output.strip().split("\n\n")
-        keys = ("Package", "Architecture", "Version")
-
-        for pkg_raw in pkg_groups:
-            lines = str(pkg_raw).splitlines()
-            vals: dict[str, str] = {}
-            for line in lines:
-                if line.startswith(keys):
-                    items = line.split(":", 1)
-                    vals[items[0]] = items[1].strip()
-                else:
-                    continue
-
+        for vals in _iter_apt_cache_records(output.splitlines()):
             epoch, split_version = DebianPackage._get_epoch_from_version(vals["Version"])
             pkg = DebianPackage(
                 name=vals["Package"],
@@ -520,13 +546,16 @@ class Version:
     https://www.debian.org/doc/debian-policy/ch-controlfields.html#version
     """
 
-    def __init__(self, version: str, epoch: str):
+    __slots__ = ("_epoch", "_version")
+
+    def __init__(self, version: str, epoch: str | None):
         self._version = version
         self._epoch = epoch or ""
 
     def __repr__(self):
         """Represent the package."""
-        return f"<{self.__module__}.{type(self).__name__}: {self.__dict__}>"
+        attrs = {slot: getattr(self, slot) for slot in self.__slots__}
+        return f"<{self.__module__}.{type(self).__name__}: {attrs}>"
 
     def __str__(self):
         """Return human-readable representation of the package."""
@@ -554,23 +583,28 @@ class Version:
         upstream, debian = version.rsplit("-", 1)
         return upstream, debian
 
-    def _listify(self, revision: str) -> list[str | int]:
-        """Split a revision string into a list.
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _listify(revision: str) -> tuple[str | int, ...]:
+        """Split a revision string into a tuple.
 
-        This list is comprised of  alternating between strings and numbers,
+        This tuple is comprised of  alternating between strings and numbers,
         padded on either end to always be "str, int, str, int..." and
         always be of even length.  This allows us to trivially implement the
         comparison algorithm described.
+
+        The same revision strings are compared over and over, so results are cached.
         """
         result: list[str | int] = []
         while revision:
-            rev_1, remains = self._get_alphas(revision)
-            rev_2, remains = self._get_digits(remains)
+            rev_1, remains = Version._get_alphas(revision)
+            rev_2, remains = Version._get_digits(remains)
             result.extend([rev_1, rev_2])
             revision = remains
-        return result
+        return tuple(result)
 
-    def _get_alphas(self, revision: str) -> tuple[str, str]:
+    @staticmethod
+    def _get_alphas(revision: str) -> tuple[str, str]:
         """Return a tuple of the first non-digit characters of a revision."""
         # get the index of the first digit
         for i, char in enumerate(revision):
@@ -581,7 +615,8 @@ class Version:
         # string is entirely alphas
         return revision, ""
 
-    def _get_digits(self, revision: str) -> tuple[int, str]:
+    @staticmethod
+    def _get_digits(revision: str) -> tuple[int, str]:
         """Return a tuple of the first integer characters of a revision."""
         # If the string is empty, return (0,'')
         if not revision:
@@ -724,11 +759,11 @@ class Version:
 
     def __le__(self, other: Version) -> bool:
         """Less than or equal to magic method impl."""
-        return self.__eq__(other) or self.__lt__(other)
+        return self._compare_version(other) <= 0
 
     def __ge__(self, other: Version) -> bool:
         """Greater than or equal to magic method impl."""
-        return self.__gt__(other) or self.__eq__(other)
+        return self._compare_version(other) >= 0
 
     def __ne__(self, other: object) -> bool:
         """Not equal to magic method impl."""
@@ -788,11 +823,11 @@ def add_package(
     failed: list[str] = []
 
     for p in package_names:
-        pkg, _ = _add(p, version, arch)
-        if isinstance(pkg, DebianPackage):
+        pkg = _find(p, version, arch)
+        if pkg is not None:
             succeeded.append(pkg)
         else:
-            logger.warning("failed to locate and install/update '%s'", pkg)
+            logger.warning("failed to locate and install/update '%s'", p)
             retry.append(p)
 
     if retry and not cache_refreshed:
@@ -800,11 +835,15 @@ def add_package(
         update()
 
         for p in retry:
-            pkg, _ = _add(p, version, arch)
-            if isinstance(pkg, DebianPackage):
+            pkg = _find(p, version, arch)
+            if pkg is not None:
                 succeeded.append(pkg)
             else:
                 failed.append(p)
+    else:
+        failed = retry
+
+    _install(succeeded)
 
     if failed:
         raise PackageError(f"Failed to install packages: {', '.join(failed)}")
@@ -812,27 +851,42 @@ def add_package(
     return succeeded if len(succeeded) > 1 else succeeded[0]
 
 
-def _add(
+def _find(
     name: str,
     version: str | None = "",
     arch: str | None = "",
-) -> tuple[DebianPackage, Literal[True]] | tuple[str, Literal[False]]:
-    """Add a package to the system.
+) -> DebianPackage | None:
+    """Look a package up on the system or in the apt cache.
 
     Args:
-        name: the name(s) of the package(s)
+        name: the name of the package
         version: an (Optional) version as a string. Defaults to the latest known
         arch: an optional architecture for the package
 
-    Returns: a tuple of `DebianPackage` if found, or a :str: if it is not, and
-        a boolean indicating success
+    Returns: the `DebianPackage` if found, or None if it is not
     """
     try:
-        pkg = DebianPackage.from_system(name, version, arch)
-        pkg.ensure(state=PackageState.Present)
-        return pkg, True
+        return DebianPackage.from_system(name, version, arch)
     except PackageNotFoundError:
-        return name, False
+        return None
+
+
+def _install(packages: list[DebianPackage]) -> None:
+    """Install all packages that are not already present with a single `apt-get` call.
+
+    Raises:
+        PackageError if packages fail to install
+    """
+    pending = [pkg for pkg in packages if pkg.state is not PackageState.Present]
+    if not pending:
+        return
+    DebianPackage._apt(
+        "install",
+        [f"{pkg.name}={pkg.version}" for pkg in pending],
+        optargs=list(_INSTALL_OPTARGS),
+    )
+    for pkg in pending:
+        pkg._state = PackageState.Present
 
 
 @typing.overload
@@ -961,8 +1015,17 @@ class GPGKeyError(Error):
 class DebianRepository:
     """An abstraction to represent a repository."""
 
-    _deb822_stanza: _Deb822Stanza | None = None
-    """set by Deb822Stanza after creating a DebianRepository"""
+    __slots__ = (
+        "_deb822_stanza",
+        "_enabled",
+        "_filename",
+        "_gpg_key_filename",
+        "_groups",
+        "_options",
+        "_release",
+        "_repotype",
+        "_uri",
+    )
 
     def __init__(
         self,
@@ -983,6 +1046,8 @@ class DebianRepository:
         self._filename = filename
         self._gpg_key_filename = gpg_key_filename
         self._options = options
+        # set by Deb822Stanza after creating a DebianRepository
+        self._deb822_stanza: _Deb822Stanza | None = None
 
     @property
     def enabled(self):
@@ -1104,12 +1169,27 @@ class DebianRepository:
                 " Please raise an issue if you require this feature."
             )
         searcher = f"{self.repotype} {self.make_options_string()}{self.uri} {self.release}"
-        with fileinput.input(self._filename, inplace=True) as lines:
-            for line in lines:
-                if re.match(rf"^{re.escape(searcher)}\s", line):
-                    print(f"# {line}", end="")
-                else:
-                    print(line, end="")
+        matcher = re.compile(rf"^(?={re.escape(searcher)}\s)", re.MULTILINE)
+        with open(self._filename) as f:
+            content = matcher.sub("# ", f.read())
+
+        # Write the result next to the original and swap it in, so readers never see a
+        # partially written sources file.
+        mode = os.stat(self._filename).st_mode
+        dirname, basename = os.path.split(self._filename)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=dirname, prefix=f".{basename}.", delete=False
+        ) as f:
+            try:
+                f.write(content)
+                f.close()
+                os.chmod(f.name, stat.S_IMODE(mode))
+                os.replace(f.name, self._filename)
+            except BaseException:
+                # Don't leave a stray file behind in the sources directory.
+                f.close()
+                os.unlink(f.name)
+                raise
 
     def import_key(self, key: str) -> None:
         """Import an ASCII Armor key.
@@ -1146,8 +1226,7 @@ class DebianRepository:
         out, err = ps.stdout.decode(), ps.stderr.decode()
         if "gpg: no valid OpenPGP data found." in err:
             raise GPGKeyError("Invalid GPG key material provided")
-        # from gnupg2 docs: fpr :: Fingerprint (fingerprint is in field 10)
-        result = re.search(r"^fpr:{9}([0-9A-F]{40}):$", out, re.MULTILINE)
+        result = _FINGERPRINT_MATCHER.search(out)
         assert result is not None
         return result.group(1)
 
@@ -1247,6 +1326,57 @@ def _repo_to_line(repo: DebianRepository, include_signed_by: bool = True) -> str
     )
 
 
+@functools.lru_cache(maxsize=1024)
+def _parse_source_line(
+    line: str,
+) -> tuple[bool, str, str, str, tuple[str, ...], str, tuple[tuple[str, str], ...]] | None:
+    """Split a one-line-style sources.list entry into its fields.
+
+    The same lines tend to show up in several files, so results are cached. They are
+    returned as immutable tuples for `RepositoryMapping._parse` to build a fresh
+    `DebianRepository` from, or None if the line is not a valid source.
+    """
+    enabled = True
+    gpg_key = ""
+    options: dict[str, str] = {}
+
+    line = line.strip()
+    if line.startswith("#"):
+        enabled = False
+        line = line[1:].lstrip()
+
+    # Every valid source type starts with "deb": reject blank lines and prose comments
+    # before running the full match.
+    if not line.startswith("deb"):
+        return None
+
+    # Check for "#" in the line and treat a part after it as a comment then strip it off.
+    i = line.find("#")
+    if i > 0:
+        line = line[:i]
+
+    # Split the source into its fields to initialize a new repo.
+    match = SOURCE_LINE_MATCHER.match(line)
+    if match is None or match["repotype"] not in VALID_SOURCE_TYPES:
+        return None
+
+    if match["options"] is not None:
+        # Get a dict representation of the repo options.
+        options = dict(o.split("=") for o in match["options"].split())
+        # Extract the 'signed-by' option for the gpg_key
+        gpg_key = options.pop("signed-by", "")
+
+    return (
+        enabled,
+        sys.intern(match["repotype"]),
+        match["uri"],
+        sys.intern(match["release"]),
+        tuple(sys.intern(group) for group in match["groups"].split()),
+        gpg_key,
+        tuple(options.items()),
+    )
+
+
 class RepositoryMapping(Mapping[str, DebianRepository]):
     """An representation of known repositories.
 
@@ -1413,50 +1543,15 @@ class RepositoryMapping(Mapping[str, DebianRepository]):
         Raises:
           InvalidSourceError if the source type is unknown
         """
-        enabled = True
-        repotype = uri = release = gpg_key = ""
-        options = {}
-        groups = []
-
-        line = line.strip()
-        if line.startswith("#"):
-            enabled = False
-            line = line[1:]
-
-        # Check for "#" in the line and treat a part after it as a comment then strip it off.
-        i = line.find("#")
-        if i > 0:
-            line = line[:i]
-
-        # Split a source into substrings to initialize a new repo.
-        source = line.strip()
-        if source:
-            # Match any repo options, and get a dict representation.
-            for v in re.findall(OPTIONS_MATCHER, source):
-                opts = dict(o.split("=") for o in v.strip("[]").split())
-                # Extract the 'signed-by' option for the gpg_key
-                gpg_key = opts.pop("signed-by", "")
-                options = opts
-
-            # Remove any options from the source string and split the string into chunks
-            source = re.sub(OPTIONS_MATCHER, "", source)
-            chunks = source.split()
-
-            # Check we've got a valid list of chunks
-            if len(chunks) < 3 or chunks[0] not in VALID_SOURCE_TYPES:
-                raise InvalidSourceError("An invalid sources line was found in %s!", filename)
-
-            repotype = chunks[0]
-            uri = chunks[1]
-            release = chunks[2]
-            groups = chunks[3:]
-
-            return DebianRepository(
-                enabled, repotype, uri, release, groups, filename, gpg_key, options
-            )
-        else:
+        fields = _parse_source_line(line)
+        if fields is None:
             raise InvalidSourceError("An invalid sources line was found in %s!", filename)
 
+        enabled, repotype, uri, release, groups, gpg_key, options = fields
+        return DebianRepository(
+            enabled, repotype, uri, release, list(groups), filename, gpg_key, dict(options)
+        )
+
     def add(  # noqa: D417  # undocumented-param: default_filename intentionally undocumented
         self, repo: DebianRepository, default_filename: bool | None = False
     ) -> None:
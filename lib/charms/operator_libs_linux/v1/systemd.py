@@ -39,6 +39,7 @@ success = service_reload("nginx", restart_on_failure=True)
 __all__ = [  # Don't export `_systemctl`. (It's not the intended way of using this lib.)
     "SystemdError",
     "daemon_reload",
+    "daemon_reload_if_needed",
     "service_disable",
     "service_enable",
     "service_failed",
@@ -64,7 +65,7 @@ LIBAPI = 1
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 4
+LIBPATCH = 5
 
 
 class SystemdError(Exception):
@@ -81,6 +82,44 @@ def _systemctl(*args: str, check: bool = False) -> int:
     Returns:
         Returncode of systemctl command execution.
 
+    Raises:
+        SystemdError: Raised if calling systemctl returns a non-zero returncode and check is True.
+    """
+    return _systemctl_run(*args, check=check).returncode
+
+
+def _systemctl_output(*args: str) -> str:
+    """Run systemctl and return its standard output.
+
+    Unlike `_systemctl`, standard error is captured separately, so that warnings printed
+    by systemctl don't end up in the output to be parsed.
+
+    Args:
+        *args: Arguments to pass to systemctl.
+
+    Returns:
+        The standard output of the systemctl command.
+
+    Raises:
+        SystemdError: Raised if calling systemctl returns a non-zero returncode.
+    """
+    return _systemctl_run(*args, check=True, stderr=subprocess.PIPE).stdout
+
+
+def _systemctl_run(
+    *args: str, check: bool, stderr: int = subprocess.STDOUT
+) -> "subprocess.CompletedProcess[str]":
+    """Run systemctl, logging its output.
+
+    Args:
+        *args: Arguments to pass to systemctl.
+        check: Check the output of the systemctl command.
+        stderr: Where to send standard error, as for `subprocess.run`. Default:
+            `subprocess.STDOUT`, which merges it into the standard output.
+
+    Returns:
+        The completed systemctl process.
+
     Raises:
         SystemdError: Raised if calling systemctl returns a non-zero returncode and check is True.
     """
@@ -90,19 +129,21 @@ def _systemctl(*args: str, check: bool = False) -> int:
         proc = subprocess.run(
             cmd,
             stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
+            stderr=stderr,
             text=True,
             bufsize=1,
             encoding="utf-8",
             check=check,
         )
         logger.debug(
-            f"Command {cmd} exit code: {proc.returncode}. systemctl output:\n{proc.stdout}"
+            f"Command {cmd} exit code: {proc.returncode}. systemctl output:\n"
+            f"{proc.stdout}{proc.stderr or ''}"
         )
-        return proc.returncode
+        return proc
     except subprocess.CalledProcessError as e:
         raise SystemdError(
-            f"Command {cmd} failed with returncode {e.returncode}. systemctl output:\n{e.stdout}"
+            f"Command {cmd} failed with returncode {e.returncode}. systemctl output:\n"
+            f"{e.stdout}{e.stderr or ''}"
         )
 
 
@@ -286,3 +327,30 @@ def daemon_reload() -> bool:
         SystemdError: Raised if `systemctl daemon-reload` returns a non-zero returncode.
     """
     return _systemctl("daemon-reload", check=True) == 0
+
+
+def daemon_reload_if_needed(*args: str) -> bool:
+    """Reload systemd manager configuration only if one of the given units needs it.
+
+    systemd flags a loaded unit with `NeedDaemonReload` once its unit file changes on disk.
+    This checks that flag for every unit with a single `systemctl show` call, and skips the
+    reload entirely when none of them has changed.
+
+    Args:
+        *args: Units whose unit files may have been modified.
+
+    Returns:
+        True if the configuration was reloaded, False if no reload was needed.
+
+    Raises:
+        TypeError: Raised if no unit is given.
+        SystemdError: Raised if `systemctl show ...` or `systemctl daemon-reload` returns a
+            non-zero returncode.
+    """
+    if not args:
+        # Without a unit, `systemctl show` reports on the manager itself.
+        raise TypeError("daemon_reload_if_needed() requires at least one unit")
+    output = _systemctl_output("show", "--property=NeedDaemonReload", "--value", *args)
+    if "yes" not in output.split():
+        return False
+    return daemon_reload()
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# Copyright 2026 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Shared fixtures for the integration tests."""
+
+import pytest
+from charms.operator_libs_linux.v2 import snap
+
+
+@pytest.fixture(scope="session")
+def snap_cache() -> snap.SnapCache:
+    """Snap cache shared by the whole test session.
+
+    The module-level `snap.add`, `snap.remove` and `snap.ensure` helpers resolve snaps
+    through the library's own cache, so the same instance is installed there: snaps
+    changed through either path stay in sync without reloading the cache from snapd.
+    """
+    snap._Cache.cache = snap.SnapCache()
+    return snap._Cache.cache
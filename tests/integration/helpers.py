@@ -2,16 +2,48 @@
 # Copyright 2021 Canonical Ltd.
 # See LICENSE file for licensing details.
 
-from subprocess import CalledProcessError, check_output
+import json
+import shutil
+from pathlib import Path
+from subprocess import check_output
+from typing import Any, Dict, Set, Tuple
+
+from charms.operator_libs_linux.v2 import snap
 
 
 def get_command_path(command: str) -> str:
+    return shutil.which(command) or ""
+
+
+def ensure_channel(snap_obj: snap.Snap, channel: str, **kwargs: Any) -> None:
+    """Ensure a snap is installed from `channel`, skipping the store refresh if it already is.
+
+    `Snap.channel` isn't updated by `Snap.ensure`, so the installed channel is read from snapd.
+    """
     try:
-        return check_output(["which", command]).decode().strip()
-    except CalledProcessError:
-        return ""
+        installed = snap.SnapClient()._request("GET", f"snaps/{snap_obj.name}")
+    except snap.SnapAPIError:
+        installed = None
+    if not installed or installed["channel"] != channel:
+        snap_obj.ensure(snap.SnapState.Latest, channel=channel, **kwargs)
+
+
+def get_snap_aliases() -> Set[Tuple[str, ...]]:
+    """Return every row of `snap aliases` (command, alias, notes) from a single call."""
+    output = check_output(["snap", "aliases"], text=True)
+    return {tuple(line.split()) for line in output.splitlines()[1:]}
+
+
+def get_snap_config(snap_name: str) -> Dict[str, Any]:
+    """Return a snap's whole configuration, as reported by a single `snap get -d`."""
+    return json.loads(check_output(["snap", "get", "-d", snap_name]))
+
+
+def line_in_file(filename: str, line: str) -> bool:
+    """Check whether the file contains `line` as a whole line."""
+    return b"\n" + line.encode() + b"\n" in b"\n" + Path(filename).read_bytes() + b"\n"
 
 
-def lines_in_file(filename):
-    with open(filename, "r") as f:
-        return [line.strip() for line in f.readlines()]
+def read_sysctl(key: str) -> str:
+    """Read a kernel parameter straight from /proc/sys, without forking `sysctl`."""
+    return Path("/proc/sys", key.replace(".", "/")).read_text().strip()
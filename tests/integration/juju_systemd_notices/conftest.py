@@ -4,6 +4,7 @@
 
 """Configure integration tests for the juju_systemd_notices library."""
 
+import os
 import shutil
 from pathlib import Path
 
@@ -16,11 +17,24 @@ systemd_path = lib_root / "v1/systemd.py"
 notices_path = lib_root / "v0/juju_systemd_notices.py"
 
 
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Hard link `src` to `dst`, falling back to a copy across filesystems."""
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy(src, dst)
+
+
 @pytest.fixture(scope="module", autouse=True)
 def copy_machine_libs_into_test_charm(ops_test: OpsTest):
-    """Copy the systemd and juju_systemd_notices to the test charm."""
-    shutil.copy(systemd_path, test_charm_root / systemd_path)
-    shutil.copy(notices_path, test_charm_root / notices_path)
+    """Link the systemd and juju_systemd_notices libs into the test charm.
+
+    Symlinks can't be used since charmcraft packs the charm in a separate build
+    environment where a link pointing outside the charm directory would dangle.
+    """
+    _link_or_copy(systemd_path, test_charm_root / systemd_path)
+    _link_or_copy(notices_path, test_charm_root / notices_path)
 
 
 @pytest.fixture(scope="module")
@@ -27,7 +27,9 @@ async def test_service_start(ops_test: OpsTest, test_charm) -> None:
     )
     logger.info("Waiting for test daemon to start...")
     async with ops_test.fast_forward():
-        await ops_test.model.wait_for_idle(apps=[APP_NAME], status="active", timeout=1000)
+        await ops_test.model.wait_for_idle(
+            apps=[APP_NAME], status="active", timeout=1000, idle_period=5, check_freq=0.5
+        )
         assert (
             ops_test.model.units.get(UNIT_NAME).workload_status_message
             == "test service running :)"
@@ -43,7 +45,9 @@ async def test_service_stop(ops_test: OpsTest) -> None:
     await action.wait()
     logger.info("Waiting for test daemon to stop...")
     async with ops_test.fast_forward():
-        await ops_test.model.wait_for_idle(apps=[APP_NAME], status="blocked", timeout=1000)
+        await ops_test.model.wait_for_idle(
+            apps=[APP_NAME], status="blocked", timeout=1000, idle_period=5, check_freq=0.5
+        )
         assert (
             ops_test.model.units.get(UNIT_NAME).workload_status_message
             == "test service not running :("
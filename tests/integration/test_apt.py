@@ -10,11 +10,14 @@ from pathlib import Path
 from typing import List
 from urllib.request import urlopen
 
+import pytest
 from charms.operator_libs_linux.v0 import apt
 from helpers import get_command_path
 
 logger = logging.getLogger(__name__)
 
+pytestmark = pytest.mark.xdist_group(name="apt")
+
 KEY_DIR = Path(__file__).parent / "keys"
 
 
@@ -33,8 +33,7 @@ def test_query_dnf_and_package() -> None:
 
 
 def test_remove_package() -> None:
-    dnf.remove("slurm-slurmdbd")
-    dnf.remove("slurm-slurmd", "slurm-slurmrestd", "slurm-slurmctld")
+    dnf.remove("slurm-slurmdbd", "slurm-slurmd", "slurm-slurmrestd", "slurm-slurmctld")
     assert dnf.fetch("slurm-slurmdbd").available
     assert dnf.fetch("slurm-slurmd").available
     assert dnf.fetch("slurm-slurmrestd").available
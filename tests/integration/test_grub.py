@@ -9,6 +9,8 @@ from charms.operator_libs_linux.v0 import grub
 
 logger = logging.getLogger(__name__)
 
+pytestmark = pytest.mark.xdist_group(name="local")
+
 
 @pytest.fixture(autouse=True)
 def clean_configs():
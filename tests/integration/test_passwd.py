@@ -5,11 +5,14 @@
 
 import logging
 
+import pytest
 from charms.operator_libs_linux.v0 import passwd
-from helpers import lines_in_file
+from helpers import line_in_file
 
 logger = logging.getLogger(__name__)
 
+pytestmark = pytest.mark.xdist_group(name="local")
+
 
 def test_add_user():
     # First check the user we're creating doesn't exist
@@ -23,8 +26,8 @@ def test_add_user():
     expected_group_line = "{}:x:{}:".format(u.pw_name, u.pw_gid)
 
     assert passwd.user_exists("test-user-0") is not None
-    assert expected_group_line in lines_in_file("/etc/group")
-    assert expected_passwd_line in lines_in_file("/etc/passwd")
+    assert line_in_file("/etc/group", expected_group_line)
+    assert line_in_file("/etc/passwd", expected_passwd_line)
     # clean up
     passwd.remove_user("test-user-0")
 
@@ -41,15 +44,15 @@ def test_remove_user():
     expected_group_line = "{}:x:{}:".format(u.pw_name, u.pw_gid)
 
     assert passwd.user_exists("test-user-0") is None
-    assert expected_group_line not in lines_in_file("/etc/group")
-    assert expected_passwd_line not in lines_in_file("/etc/passwd")
+    assert not line_in_file("/etc/group", expected_group_line)
+    assert not line_in_file("/etc/passwd", expected_passwd_line)
 
 
 def test_add_user_with_params():
     u = passwd.add_user(username="test-user-1", shell="/bin/bash", primary_group="admin")
     expected = "{}:x:{}:{}::{}:{}".format(u.pw_name, u.pw_uid, u.pw_gid, u.pw_dir, u.pw_shell)
 
-    assert expected in lines_in_file("/etc/passwd")
+    assert line_in_file("/etc/passwd", expected)
 
     passwd.remove_user("test-user-1")
 
@@ -62,7 +65,7 @@ def test_add_group():
     expected = "{}:x:{}:".format(g.gr_name, g.gr_gid)
 
     assert passwd.group_exists("test-group") is not None
-    assert expected in lines_in_file("/etc/group")
+    assert line_in_file("/etc/group", expected)
 
     passwd.remove_group("test-group")
 
@@ -72,11 +75,11 @@ def test_remove_group():
     assert passwd.group_exists("test-group") is not None
 
     expected = "{}:x:{}:".format(g.gr_name, g.gr_gid)
-    assert expected in lines_in_file("/etc/group")
+    assert line_in_file("/etc/group", expected)
 
     passwd.remove_group("test-group")
     assert passwd.group_exists("test-group") is None
-    assert expected not in lines_in_file("/etc/group")
+    assert not line_in_file("/etc/group", expected)
 
 
 def test_add_group_with_gid():
@@ -87,6 +90,6 @@ def test_add_group_with_gid():
     expected = "test-group:x:1099:"
 
     assert passwd.group_exists("test-group") is not None
-    assert expected in lines_in_file("/etc/group")
+    assert line_in_file("/etc/group", expected)
 
     passwd.remove_group("test-group")
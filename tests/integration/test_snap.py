@@ -4,23 +4,65 @@
 
 
 import logging
+import os
 import re
 import time
 from datetime import datetime, timedelta
-from subprocess import CalledProcessError, check_output, run
+from subprocess import CalledProcessError, check_call, check_output, run
 
 import pytest
 from charms.operator_libs_linux.v2 import snap
-from helpers import get_command_path
+from helpers import ensure_channel, get_command_path, get_snap_aliases, get_snap_config
 
 logger = logging.getLogger(__name__)
 
+STABLE_REVISION_RE = re.compile(rb"3/stable.*\((\d+)\)")
 
-def test_snap_install():
+
+@pytest.fixture(scope="module")
+def hello_world(snap_cache: snap.SnapCache) -> snap.Snap:
+    hello_world = snap_cache["hello-world"]
+    ensure_channel(hello_world, "latest/stable")
+    return hello_world
+
+
+@pytest.fixture(scope="module")
+def kube_proxy(snap_cache: snap.SnapCache) -> snap.Snap:
+    kube_proxy = snap_cache["kube-proxy"]
+    ensure_channel(kube_proxy, "latest/stable", classic=True)
+    return kube_proxy
+
+
+@pytest.fixture(scope="module")
+def lxd(snap_cache: snap.SnapCache) -> snap.Snap:
+    lxd = snap_cache["lxd"]
+
+    def try_ensure_snap(retries: int) -> None:
+        # lxd is preinstalled and snapd may still be refreshing it when the tests start
+        try:
+            ensure_channel(lxd, "latest/stable")
+        except snap.SnapError:
+            if retries <= 0:
+                raise
+            time.sleep(20)
+            try_ensure_snap(retries=retries - 1)
+
+    try_ensure_snap(retries=10)
+    return lxd
+
+
+@pytest.fixture(scope="module")
+def vlc(snap_cache: snap.SnapCache) -> snap.Snap:
+    vlc = snap_cache["vlc"]
+    ensure_channel(vlc, "latest/stable", classic=True)
+    return vlc
+
+
+@pytest.mark.xdist_group(name="juju")
+def test_snap_install(snap_cache: snap.SnapCache):
     # Try by initialising the cache first, then using ensure
     try:
-        cache = snap.SnapCache()
-        juju = cache["juju"]
+        juju = snap_cache["juju"]
         if not juju.present:
             juju.ensure(snap.SnapState.Latest, channel="stable")
     except snap.SnapError as e:
@@ -29,15 +71,16 @@ def test_snap_install():
     assert get_command_path("juju") == "/snap/bin/juju"
 
 
+@pytest.mark.xdist_group(name="charmcraft")
 def test_snap_install_bare():
     snap.add(["charmcraft"], state=snap.SnapState.Latest, classic=True, channel="candidate")
     assert get_command_path("charmcraft") == "/snap/bin/charmcraft"
 
 
-def test_snap_remove():
+@pytest.mark.xdist_group(name="charmcraft")
+def test_snap_remove(snap_cache: snap.SnapCache):
     # First ensure that charmcraft is installed (it might be if this is run after the install test)
-    cache = snap.SnapCache()
-    charmcraft = cache["charmcraft"]
+    charmcraft = snap_cache["charmcraft"]
     if not charmcraft.present:
         charmcraft.ensure(snap.SnapState.Latest, classic="True", channel="candidate")
 
@@ -47,37 +90,16 @@ def test_snap_remove():
     assert get_command_path("charmcraft") == ""
 
 
-def test_snap_refresh():
-    cache = snap.SnapCache()
-    hello_world = cache["hello-world"]
-    if not hello_world.present:
-        hello_world.ensure(snap.SnapState.Latest, channel="latest/stable")
-
-    cache = snap.SnapCache()
-    hello_world = cache["hello-world"]
-    assert hello_world.channel == "latest/stable"
+@pytest.mark.xdist_group(name="hello-world")
+def test_snap_refresh(hello_world: snap.Snap):
+    # Channels are asserted against a fresh cache so that they come straight from snapd
+    assert snap.SnapCache()["hello-world"].channel == "latest/stable"
     hello_world.ensure(snap.SnapState.Latest, channel="latest/candidate")
-    # Refresh cache
-    cache = snap.SnapCache()
-    hello_world = cache["hello-world"]
-    assert hello_world.channel == "latest/candidate"
-
+    assert snap.SnapCache()["hello-world"].channel == "latest/candidate"
 
-def test_snap_set_and_get_with_typed():
-    cache = snap.SnapCache()
-    lxd = cache["lxd"]
-
-    def try_ensure_snap(retries: int) -> None:
-        try:
-            lxd.ensure(snap.SnapState.Latest, channel="latest")
-        except snap.SnapError:
-            if retries <= 0:
-                raise
-            time.sleep(20)
-            try_ensure_snap(retries=retries - 1)
-
-    try_ensure_snap(retries=10)
 
+@pytest.mark.xdist_group(name="lxd")
+def test_snap_set_and_get_with_typed(lxd: snap.Snap):
     configs = {
         "true": True,
         "false": False,
@@ -98,37 +120,12 @@ def test_snap_set_and_get_with_typed():
     }
 
     lxd.set(configs, typed=True)
-
-    assert lxd.get("true", typed=True)
-    assert not lxd.get("false", typed=True)
-    with pytest.raises(snap.SnapError):
-        lxd.get("null", typed=True)
-    assert lxd.get("integer", typed=True) == 1
-    assert lxd.get("float", typed=True) == 2.0
-    assert lxd.get("list", typed=True) == [1, 2.0, True, False, None]
+    config = get_snap_config("lxd")
 
     # Note that `"null": None` will be missing here because `key=null` will not
     # be set (because it means unset in snap). However, `key=[null]` will be
     # okay, and that's why `None` exists in "list".
-    assert lxd.get("dict", typed=True) == {
-        "true": True,
-        "false": False,
-        "integer": 1,
-        "float": 2.0,
-        "list": [1, 2.0, True, False, None],
-    }
-
-    assert lxd.get("dict.true", typed=True)
-    assert not lxd.get("dict.false", typed=True)
-    with pytest.raises(snap.SnapError):
-        lxd.get("dict.null", typed=True)
-    assert lxd.get("dict.integer", typed=True) == 1
-    assert lxd.get("dict.float", typed=True) == 2.0
-    assert lxd.get("dict.list", typed=True) == [1, 2.0, True, False, None]
-
-    assert lxd.get("criu.enable", typed=True) == "true"
-    assert lxd.get("ceph.external", typed=True) == "false"
-    assert lxd.get(None, typed=True) == {
+    assert config == {
         "true": True,
         "false": False,
         "integer": 1,
@@ -145,26 +142,26 @@ def test_snap_set_and_get_with_typed():
         "ceph": {"external": "false"},
     }
 
+    # Check the library's own lookups against the same configuration.
+    assert lxd.get(None, typed=True) == config
+    assert lxd.get("integer", typed=True) == 1
+    assert lxd.get("dict.list", typed=True) == [1, 2.0, True, False, None]
+    assert lxd.get("criu.enable", typed=True) == "true"
+    with pytest.raises(snap.SnapError):
+        lxd.get("null", typed=True)
+    with pytest.raises(snap.SnapError):
+        lxd.get("dict.null", typed=True)
 
-def test_snap_set_and_get_untyped():
-    cache = snap.SnapCache()
-    lxd = cache["lxd"]
-    try:
-        lxd.ensure(snap.SnapState.Latest, channel="latest")
-    except snap.SnapError:
-        time.sleep(60)
-        lxd.ensure(snap.SnapState.Latest, channel="latest")
 
+@pytest.mark.xdist_group(name="lxd")
+def test_snap_set_and_get_untyped(lxd: snap.Snap):
     lxd.set({"foo": "true", "bar": True}, typed=False)
     assert lxd.get("foo", typed=False) == "true"
     assert lxd.get("bar", typed=False) == "True"
 
 
-def test_unset_key_raises_snap_error():
-    cache = snap.SnapCache()
-    lxd = cache["lxd"]
-    lxd.ensure(snap.SnapState.Latest, channel="latest")
-
+@pytest.mark.xdist_group(name="lxd")
+def test_unset_key_raises_snap_error(lxd: snap.Snap):
     # Verify that the correct exception gets raised in the case of an unset key.
     key = "keythatdoesntexist01"
     try:
@@ -179,9 +176,9 @@ def test_unset_key_raises_snap_error():
     assert lxd.get(key) == "true"
 
 
-def test_snap_ensure():
-    cache = snap.SnapCache()
-    charmcraft = cache["charmcraft"]
+@pytest.mark.xdist_group(name="charmcraft")
+def test_snap_ensure(snap_cache: snap.SnapCache):
+    charmcraft = snap_cache["charmcraft"]
 
     # Verify that we can run ensure multiple times in a row without delays.
     charmcraft.ensure(snap.SnapState.Latest, channel="latest/stable")
@@ -189,128 +186,89 @@ def test_snap_ensure():
     charmcraft.ensure(snap.SnapState.Latest, channel="latest/stable")
 
 
-def test_new_snap_ensure():
-    vlc = snap.SnapCache()["vlc"]
+@pytest.mark.xdist_group(name="vlc")
+def test_new_snap_ensure(snap_cache: snap.SnapCache):
+    vlc = snap_cache["vlc"]
     vlc.ensure(snap.SnapState.Latest, channel="edge")
 
 
-def test_snap_ensure_revision():
-    juju = snap.SnapCache()["juju"]
+@pytest.mark.xdist_group(name="juju")
+def test_snap_ensure_revision(snap_cache: snap.SnapCache):
+    juju = snap_cache["juju"]
 
     # Verify that the snap is not installed
     juju.ensure(snap.SnapState.Available)
     assert get_command_path("juju") == ""
 
     # Install the snap with the revision of latest/edge
-    snap_info_juju = run(
-        ["snap", "info", "juju"], capture_output=True, encoding="utf-8"
-    ).stdout.split("\n")
-
-    edge_revision = None
-    for line in snap_info_juju:
-        match = re.search(r"3/stable.*\((\d+)\)", line)
-
-        if match:
-            edge_revision = match.group(1)
-            break
-    assert edge_revision is not None
+    # `.` doesn't match newlines, so the first match is confined to a single line
+    match = STABLE_REVISION_RE.search(run(["snap", "info", "juju"], capture_output=True).stdout)
+    assert match is not None
+    edge_revision = match.group(1).decode()
 
     juju.ensure(snap.SnapState.Present, revision=edge_revision)
 
     assert get_command_path("juju") == "/snap/bin/juju"
+    # snapd points the "current" symlink at the revision that is installed and active
+    assert os.readlink("/snap/juju/current") == edge_revision
 
-    snap_info_juju = run(
-        ["snap", "info", "juju"],
-        capture_output=True,
-        encoding="utf-8",
-    ).stdout.strip()
-
-    assert "installed" in snap_info_juju
-    for line in snap_info_juju.split("\n"):
-        if "installed" in line:
-            match = re.search(r"installed.*\((\d+)\)", line)
-
-            assert match is not None
-            assert match.group(1) == edge_revision
 
-
-def test_snap_start():
-    cache = snap.SnapCache()
-    kp = cache["kube-proxy"]
-    kp.ensure(snap.SnapState.Latest, classic=True, channel="latest/stable")
-
-    assert kp.services
-    kp.start()
-    assert kp.services["daemon"]["active"] is not False
+@pytest.mark.xdist_group(name="kube-proxy")
+def test_snap_start(kube_proxy: snap.Snap):
+    assert kube_proxy.services
+    kube_proxy.start()
+    assert kube_proxy.services["daemon"]["active"] is not False
 
     with pytest.raises(snap.SnapError):
-        kp.start(["foobar"])
-
-
-def test_snap_stop():
-    cache = snap.SnapCache()
-    kp = cache["kube-proxy"]
-    kp.ensure(snap.SnapState.Latest, classic=True, channel="latest/stable")
+        kube_proxy.start(["foobar"])
 
-    kp.stop(["daemon"], disable=True)
-    assert kp.services["daemon"]["active"] is False
-    assert kp.services["daemon"]["enabled"] is False
 
+@pytest.mark.xdist_group(name="kube-proxy")
+def test_snap_stop(kube_proxy: snap.Snap):
+    kube_proxy.stop(["daemon"], disable=True)
+    assert kube_proxy.services["daemon"]["active"] is False
+    assert kube_proxy.services["daemon"]["enabled"] is False
 
-def test_snap_logs():
-    cache = snap.SnapCache()
-    kp = cache["kube-proxy"]
-    kp.ensure(snap.SnapState.Latest, classic=True, channel="latest/stable")
 
-    # Terrible means of populating logs
-    kp.start()
-    kp.stop()
-    kp.start()
-    kp.stop()
+@pytest.mark.xdist_group(name="kube-proxy")
+def test_snap_logs(kube_proxy: snap.Snap):
+    # Populate the logs by cycling the service through systemd directly: each restart logs
+    # both the stop and the start, without going through a snapd change for either
+    for _ in range(2):
+        check_call(["systemctl", "restart", "snap.kube-proxy.daemon.service"])
 
-    assert len(kp.logs(num_lines=15).splitlines()) >= 4
+    assert len(kube_proxy.logs(num_lines=15).splitlines()) >= 4
 
 
-def test_snap_restart():
-    cache = snap.SnapCache()
-    kp = cache["kube-proxy"]
-    kp.ensure(snap.SnapState.Latest, classic=True, channel="latest/stable")
-
+@pytest.mark.xdist_group(name="kube-proxy")
+def test_snap_restart(kube_proxy: snap.Snap):
     try:
-        kp.restart()
+        kube_proxy.restart()
     except CalledProcessError as e:
         pytest.fail(e.stderr)
 
 
-def test_snap_hold_refresh():
-    cache = snap.SnapCache()
-    hw = cache["hello-world"]
-    hw.ensure(snap.SnapState.Latest, channel="latest/stable")
-
-    hw.hold(duration=timedelta(hours=24))
-    assert hw.held
-
-
-def test_snap_unhold_refresh():
-    cache = snap.SnapCache()
-    hw = cache["hello-world"]
-    hw.ensure(snap.SnapState.Latest, channel="latest/stable")
+@pytest.mark.xdist_group(name="hello-world")
+def test_snap_hold_refresh(hello_world: snap.Snap):
+    hello_world.hold(duration=timedelta(hours=24))
+    assert hello_world.held
 
-    hw.unhold()
-    assert not hw.held
 
+@pytest.mark.xdist_group(name="hello-world")
+def test_snap_unhold_refresh(hello_world: snap.Snap):
+    hello_world.unhold()
+    assert not hello_world.held
 
-def test_snap_connect():
-    cache = snap.SnapCache()
-    vlc = cache["vlc"]
-    vlc.ensure(snap.SnapState.Latest, classic=True, channel="latest/stable")
 
+@pytest.mark.xdist_group(name="vlc")
+def test_snap_connect(vlc: snap.Snap):
     try:
         vlc.connect("jack1")
     except CalledProcessError as e:
         pytest.fail(e.stderr)
 
 
+@pytest.mark.xdist_group(name="refresh-hold")
 def test_hold_refresh():
     hold_date = (datetime.now() + timedelta(days=90)).strftime("%Y-%m-%d")
     snap.hold_refresh()
@@ -318,12 +276,14 @@ def test_hold_refresh():
     assert f"hold: {hold_date}" in result.decode()
 
 
+@pytest.mark.xdist_group(name="refresh-hold")
 def test_forever_hold_refresh():
     snap.hold_refresh(forever=True)
     result = check_output(["snap", "get", "system", "refresh.hold"])
     assert "forever" in result.decode()
 
 
+@pytest.mark.xdist_group(name="refresh-hold")
 def test_reset_hold_refresh():
     snap.hold_refresh()
     snap.hold_refresh(0)
@@ -331,10 +291,8 @@ def test_reset_hold_refresh():
     assert "hold: " not in result.decode()
 
 
-def test_alias():
-    cache = snap.SnapCache()
-    lxd = cache["lxd"]
+@pytest.mark.xdist_group(name="lxd")
+def test_alias(lxd: snap.Snap):
     lxd.alias("lxc", "testlxc")
-    result = check_output(["snap", "aliases"], text=True)
-    found = any(line.split() == ["lxd.lxc", "testlxc", "manual"] for line in result.splitlines())
-    assert found, result
+    aliases = get_snap_aliases()
+    assert ("lxd.lxc", "testlxc", "manual") in aliases, aliases
@@ -2,24 +2,29 @@
 # Copyright 2023 Canonical Ltd.
 # See LICENSE file for licensing details.
 
-
 from pathlib import Path
 from subprocess import check_output
 
+import pytest
 from charms.operator_libs_linux.v0 import sysctl
+from helpers import read_sysctl
+
+pytestmark = pytest.mark.xdist_group(name="sysctl")
+
+SYSCTL_DIR = Path("/etc/sysctl.d")
+MERGED_FILE = SYSCTL_DIR / "95-juju-sysctl.conf"
 
 
 def test_configure():
     cfg = sysctl.Config("test1")
     cfg.configure({"net.ipv4.tcp_max_syn_backlog": "4096"})
 
+    # Go through the sysctl binary here; the other tests read /proc/sys directly.
     result = check_output(["sysctl", "net.ipv4.tcp_max_syn_backlog"])
 
-    test_file = Path("/etc/sysctl.d/90-juju-test1")
-    merged_file = Path("/etc/sysctl.d/95-juju-sysctl.conf")
     assert "net.ipv4.tcp_max_syn_backlog = 4096" in result.decode()
-    assert test_file.exists()
-    assert merged_file.exists()
+    assert (SYSCTL_DIR / "90-juju-test1").exists()
+    assert MERGED_FILE.exists()
 
 
 def test_multiple_configure():
@@ -27,27 +32,18 @@ def test_multiple_configure():
     cfg_2 = sysctl.Config("test2")
     cfg_2.configure({"net.ipv4.tcp_window_scaling": "2"})
 
-    test_file_2 = Path("/etc/sysctl.d/90-juju-test2")
-    merged_file = Path("/etc/sysctl.d/95-juju-sysctl.conf")
-    result = check_output([
-        "sysctl",
-        "net.ipv4.tcp_max_syn_backlog",
-        "net.ipv4.tcp_window_scaling",
-    ])
-    assert (
-        "net.ipv4.tcp_max_syn_backlog = 4096\nnet.ipv4.tcp_window_scaling = 2\n" in result.decode()
-    )
-    assert test_file_2.exists()
+    assert read_sysctl("net.ipv4.tcp_max_syn_backlog") == "4096"
+    assert read_sysctl("net.ipv4.tcp_window_scaling") == "2"
+    assert (SYSCTL_DIR / "90-juju-test2").exists()
 
-    with open(merged_file, "r") as f:
-        result = f.read()
-        assert "# test1\nnet.ipv4.tcp_max_syn_backlog=4096" in result
-        assert "# test2\nnet.ipv4.tcp_window_scaling=2" in result
+    # The order of the sections depends on the directory listing, so check each one.
+    merged = MERGED_FILE.read_text()
+    assert "# test1\nnet.ipv4.tcp_max_syn_backlog=4096" in merged
+    assert "# test2\nnet.ipv4.tcp_window_scaling=2" in merged
 
 
 def test_remove():
     cfg = sysctl.Config("test")
     cfg.remove()
 
-    test_file = Path("/etc/sysctl.d/90-juju-test")
-    assert not test_file.exists()
+    assert not (SYSCTL_DIR / "90-juju-test").exists()
@@ -4,11 +4,17 @@
 
 
 import logging
-from subprocess import check_output
+import os
+import textwrap
+import time
+from pathlib import Path
+from subprocess import check_call, check_output, run
 
+import pytest
 from charms.operator_libs_linux.v1.systemd import (
     SystemdError,
     daemon_reload,
+    daemon_reload_if_needed,
     service_failed,
     service_pause,
     service_reload,
@@ -22,23 +28,69 @@ from charms.operator_libs_linux.v1.systemd import (
 logger = logging.getLogger(__name__)
 
 
-def test_service():
+@pytest.fixture(scope="module", autouse=True)
+def cron_state():
+    """Snapshot whether cron is active and enabled, and restore that once the module is done."""
+    active = run(["systemctl", "is-active", "cron"], capture_output=True, text=True)
+    enabled = run(["systemctl", "is-enabled", "cron"], capture_output=True, text=True)
+    yield
+    check_call(["systemctl", "enable" if enabled.returncode == 0 else "disable", "cron"])
+    check_call(["systemctl", "start" if active.returncode == 0 else "stop", "cron"])
+
+
+def unit_properties(svc: str, *properties: str) -> dict:
+    """Return the given properties of a unit, fetched with a single `systemctl show` call."""
+    args = [f"--property={prop}" for prop in properties]
+    output = check_output(["systemctl", "show", svc, *args], text=True)
+    return dict(line.split("=", 1) for line in output.splitlines() if line)
+
+
+def _wait_state(svc: str, target: str, timeout: float = 2.0) -> bool:
+    """Poll the ActiveState of a unit with exponential backoff until it reaches `target`."""
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    while True:
+        if unit_properties(svc, "ActiveState")["ActiveState"] == target:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(delay)
+        delay *= 2
+
+
+@pytest.fixture
+def scratch_unit():
+    """Remove the unit created by a test, and clear its failed state, once the test is done."""
+    path = Path("/etc/systemd/system/test.service")
+    yield path.name
+    run(["systemctl", "stop", path.name], check=False)
+    path.unlink(missing_ok=True)
+    daemon_reload()
+    run(["systemctl", "reset-failed", path.name], check=False)
+
+
+def test_service(scratch_unit: str):
     def create_service(name: str, start_command: str):
         """Create a custom service."""
-        content = f"""[Unit]
-        Description=Test Service
-        After=multi-user.target
-
-        [Service]
-        ExecStart=/usr/bin/bash -c "{start_command}"
-        Type=simple
-
-        [Install]
-        WantedBy=multi-user.target
-        """
-
-        with open(f"/etc/systemd/system/{name}", "w+") as f:
-            f.writelines([f"{line.strip()}\n" for line in content.split("\n")])
+        content = textwrap.dedent(f"""\
+            [Unit]
+            Description=Test Service
+            After=multi-user.target
+
+            [Service]
+            ExecStart=/usr/bin/bash -c "{start_command}"
+            Type=simple
+
+            [Install]
+            WantedBy=multi-user.target
+            """)
+
+        # Write the unit in one go and move it into place, so systemd never sees a partial file.
+        path = Path("/etc/systemd/system", name)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(content)
+        os.replace(tmp, path)
+        daemon_reload()
 
         service_restart(name)
 
@@ -48,20 +100,27 @@ def test_service():
     assert not service_running("foo")
 
     # test custom service with correct command
-    create_service("test.service", "while true; do echo; sleep 1; done")
-    assert service_running("test.service")
-    service_stop("test.service")
+    create_service(scratch_unit, "while true; do echo; sleep 1; done")
+    assert _wait_state(scratch_unit, "active")
+    assert service_running(scratch_unit)
+    service_stop(scratch_unit)
 
     # test failed status
-    create_service("test.service", "bad command")
-    assert service_failed("test.service")
+    create_service(scratch_unit, "bad command")
+    assert _wait_state(scratch_unit, "failed")
+    assert service_failed(scratch_unit)
 
 
-def test_pause_and_resume():
-    # Verify that we can disable and re-enable a service.
-    assert service_pause("cron")
+@pytest.mark.parametrize(
+    "stop, start",
+    [(service_pause, service_resume), (service_stop, service_start)],
+    ids=["pause-resume", "stop-start"],
+)
+def test_service_cycle(stop, start):
+    # Verify that we can take cron down and bring it back up again.
+    assert stop("cron")
     assert not service_running("cron")
-    assert service_resume("cron")
+    assert start("cron")
     assert service_running("cron")
 
 
@@ -70,14 +129,6 @@ def test_restart():
     assert service_restart("cron")
 
 
-def test_stop_and_start():
-    # Verify that we can stop and start a service.
-    assert service_stop("cron")
-    assert not service_running("cron")
-    assert service_start("cron")
-    assert service_running("cron")
-
-
 def test_reload():
     # Verify that we can reload services that support reload.
     try:
@@ -86,26 +137,33 @@ def test_reload():
         pass
     else:
         raise AssertionError("cron does not support reload, but we didn't raise and error.")
-    assert service_reload("apparmor")
 
     # The following is observed behavior. Not sure how happy I am about it.
     assert service_reload("cron", restart_on_failure=True)
 
 
+@pytest.mark.slow
+def test_reload_apparmor():
+    # Reloading apparmor reparses every profile on the machine.
+    assert service_reload("apparmor")
+
+
 def test_daemon_reload():
     # Verify that we can reload the systemd manager configuration.
 
-    def needs_reload(svc: str):
-        """Check if a given service has changed, and requires a daemon-reload."""
-        output = check_output(["systemctl", "show", svc, "--property=NeedDaemonReload"])
-        return output.decode().strip() == "NeedDaemonReload=yes"
+    unit = Path("/lib/systemd/system/cron.service")
+    original = unit.read_text()
+
+    # Nothing has changed yet, so there is nothing to reload.
+    assert not daemon_reload_if_needed("cron")
 
     # Edit a unit file such that a reload would be required
-    with open("/lib/systemd/system/cron.service", "r+") as f:
-        content = f.read()
-        content.replace("Restart=on-failure", "Restart=never")
-        f.write(content)
-
-    assert needs_reload("cron")
-    assert daemon_reload()
-    assert not needs_reload("cron")
+    unit.write_text(original.replace("Restart=on-failure", "Restart=no"))
+    try:
+        assert unit_properties("cron", "NeedDaemonReload") == {"NeedDaemonReload": "yes"}
+        assert daemon_reload_if_needed("cron")
+        props = unit_properties("cron", "NeedDaemonReload", "LoadState")
+        assert props == {"NeedDaemonReload": "no", "LoadState": "loaded"}
+    finally:
+        unit.write_text(original)
+        daemon_reload()
@@ -24,59 +24,70 @@ import threading
 import urllib.parse
 
 
+def _json_bytes(obj):
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _error_body(status, status_code, message):
+    return _json_bytes({
+        "result": {"message": message},
+        "status": status,
+        "status-code": status_code,
+        "type": "error",
+    })
+
+
+_NOT_FOUND_BODY = _error_body("Not Found", 404, "invalid API endpoint requested")
+_METHOD_NOT_ALLOWED_BODY = _error_body("Method Not Allowed", 405, 'method "PUT" not allowed')
+_SECTIONS_BODY = _json_bytes({
+    "type": "sync",
+    "status-code": 200,
+    "status": "OK",
+    "result": [
+        "featured",
+        "database",
+        "ops",
+        "messaging",
+        "media",
+        "internet-of-things",
+    ],
+})
+
+
 class Handler(http.server.BaseHTTPRequestHandler):
-    def __init__(self, request, client_address, server):
-        self.routes = [
-            ("GET", re.compile(r"^/sections$"), self.get_sections),
-        ]
-        super().__init__(request, ("unix-socket", 80), server)
+    # (method, path regex, handler method name, whether it takes a JSON body), compiled
+    # once, shared by every request.
+    routes = (("GET", re.compile(r"^/sections$"), "get_sections", False),)
+
+    def address_string(self):
+        # Unix socket peers have no address to report in the request log.
+        return "unix-socket"
+
+    def log_message(self, *args):
+        # Keep the per-request access log off the test output.
+        pass
 
     def respond(self, resp, status=200):
+        self.respond_bytes(_json_bytes(resp), status)
+
+    def respond_bytes(self, body, status=200):
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
         self.end_headers()
-        resp_json = json.dumps(resp, indent=4, sort_keys=True)
-        self.wfile.write(resp_json.encode("utf-8"))
+        self.wfile.write(body)
 
     def bad_request(self, message):
-        d = {
-            "result": {
-                "message": message,
-            },
-            "status": "Bad Request",
-            "status-code": 400,
-            "type": "error",
-        }
-        self.respond(d, 400)
+        self.respond_bytes(_error_body("Bad Request", 400, message), 400)
 
     def not_found(self):
-        d = {
-            "result": {"message": "invalid API endpoint requested"},
-            "status": "Not Found",
-            "status-code": 404,
-            "type": "error",
-        }
-        self.respond(d, 404)
+        self.respond_bytes(_NOT_FOUND_BODY, 404)
 
     def method_not_allowed(self):
-        d = {
-            "result": {"message": 'method "PUT" not allowed'},
-            "status": "Method Not Allowed",
-            "status-code": 405,
-            "type": "error",
-        }
-        self.respond(d, 405)
+        self.respond_bytes(_METHOD_NOT_ALLOWED_BODY, 405)
 
     def internal_server_error(self, msg):
-        d = {
-            "result": {
-                "message": "internal server error: {}".format(msg),
-            },
-            "status": "Internal Server Error",
-            "status-code": 500,
-            "type": "error",
-        }
-        self.respond(d, 500)
+        body = _error_body("Internal Server Error", 500, "internal server error: {}".format(msg))
+        self.respond_bytes(body, 500)
 
     def do_GET(self):  # noqa: N802
         self.do_request("GET")
@@ -86,8 +97,9 @@ class Handler(http.server.BaseHTTPRequestHandler):
 
     def do_request(self, request_method):
         path, _, query = self.path.partition("?")
-        path = urllib.parse.unquote(path)
-        query = dict(urllib.parse.parse_qsl(query))
+        if "%" in path:
+            path = urllib.parse.unquote(path)
+        query = dict(urllib.parse.parse_qsl(query)) if query else {}
 
         if not path.startswith("/v1/"):
             self.not_found()
@@ -95,13 +107,13 @@ class Handler(http.server.BaseHTTPRequestHandler):
         path = path[3:]
 
         allowed = []
-        for method, regex, func in self.routes:
+        for method, regex, func_name, has_body in self.routes:
             match = regex.match(path)
             if match:
                 if request_method == method:
-                    data = self.read_body_json()
+                    data = self.read_body_json() if has_body else None
                     try:
-                        func(match, query, data)
+                        getattr(self, func_name)(match, query, data)
                     except Exception as e:
                         self.internal_server_error(e)
                         raise
@@ -127,29 +139,21 @@ class Handler(http.server.BaseHTTPRequestHandler):
         return json.loads(body)
 
     def get_sections(self, match, query, data):
-        self.respond({
-            "type": "sync",
-            "status-code": 200,
-            "status": "OK",
-            "result": {
-                [
-                    "featured",
-                    "database",
-                    "ops",
-                    "messaging",
-                    "media",
-                    "internet-of-things",
-                ]
-            },
-        })
+        self.respond_bytes(_SECTIONS_BODY)
+
+
+class Server(socketserver.ThreadingUnixStreamServer):
+    # Handle each connection on its own thread, and don't let a stuck handler
+    # hold up shutdown or interpreter exit.
+    daemon_threads = True
 
 
 def start_server():
     socket_dir = tempfile.mkdtemp(prefix="test-ops.snap")
     socket_path = os.path.join(socket_dir, "test.socket")
 
-    server = socketserver.UnixStreamServer(socket_path, Handler)
-    thread = threading.Thread(target=server.serve_forever)
+    server = Server(socket_path, Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
     thread.start()
 
     def shutdown():
@@ -2,544 +2,429 @@
 # See LICENSE file for licensing details.
 
 import subprocess
-import unittest
-from unittest.mock import patch
+from pathlib import Path
+from unittest.mock import DEFAULT, patch
 
+import pytest
 from charms.operator_libs_linux.v0 import apt
 
-dpkg_output_zsh = """Desired=Unknown/Install/Remove/Purge/Hold
-| Status=Not/Inst/Conf-files/Unpacked/halF-conf/Half-inst/trig-aWait/Trig-pend
-|/ Err?=(none)/Reinst-required (Status,Err: uppercase=bad)
-||/ Name                                 Version                                                                   Architecture Description
-+++-====================================-=========================================================================-============-===============================================================================
-ii  zsh                                  5.8-3ubuntu1                                                              amd64        shell with lots of features
-"""
-
-dpkg_output_vim = """Desired=Unknown/Install/Remove/Purge/Hold
-| Status=Not/Inst/Conf-files/Unpacked/halF-conf/Half-inst/trig-aWait/Trig-pend
-|/ Err?=(none)/Reinst-required (Status,Err: uppercase=bad)
-||/ Name                                 Version                                                                   Architecture Description
-+++-====================================-=========================================================================-============-===============================================================================
-ii  vim                           2:8.1.2269-1ubuntu5                                                       amd64          Vi IMproved - Common files
-"""
-
-dpkg_output_all_arch = """Desired=Unknown/Install/Remove/Purge/Hold
-| Status=Not/Inst/Conf-files/Unpacked/halF-conf/Half-inst/trig-aWait/Trig-pend
-|/ Err?=(none)/Reinst-required (Status,Err: uppercase=bad)
-||/ Name                                 Version                                                                   Architecture Description
-+++-====================================-=========================================================================-============-===============================================================================
-ii  postgresql                           12+214ubuntu0.1                                                           all         object-relational SQL database (supported version)
-"""
-
-dpkg_output_multi_arch = """Desired=Unknown/Install/Remove/Purge/Hold
-| Status=Not/Inst/Conf-files/Unpacked/halF-conf/Half-inst/trig-aWait/Trig-pend
-|/ Err?=(none)/Reinst-required (Status,Err: uppercase=bad)
-||/ Name                                 Version                                                                   Architecture Description
-+++-====================================-=========================================================================-============-===============================================================================
-ii  vim                           2:8.1.2269-1ubuntu5                                                       amd64          Vi IMproved - Common files
-ii  vim                           2:8.1.2269-1ubuntu5                                                       i386          Vi IMproved - Common files
-"""
-
-dpkg_output_not_installed = """Desired=Unknown/Install/Remove/Purge/Hold
-| Status=Not/Inst/Conf-files/Unpacked/halF-conf/Half-inst/trig-aWait/Trig-pend
-|/ Err?=(none)/Reinst-required (Status,Err: uppercase=bad)
-||/ Name                              Version               Architecture          Description
-+++-=================================-=====================-=====================-========================================================================
-rc  ubuntu-advantage-tools            27.2.2~16.04.1        amd64                 management tools for Ubuntu Advantage
-"""
-
-apt_cache_mocktester = """
-Package: mocktester
-Architecture: amd64
-Version: 1:1.2.3-4
-Priority: optional
-Section: test
-Origin: Ubuntu
-Maintainer: Ubuntu Developers <ubuntu-devel-discuss@lists.ubuntu.com>
-Original-Maintainer: Debian GNOME Maintainers <pkg-gnome-maintainers@lists.alioth.debian.org>
-Bugs: https://bugs.launchpad.net/ubuntu/+filebug
-Installed-Size: 1234
-Depends: vim-common
-Recommends: zsh
-Suggests: foobar
-Filename: pool/main/m/mocktester/mocktester_1:1.2.3-4_amd64.deb
-Size: 65536
-MD5sum: a87e414ad5aede7c820ce4c4e6bc7fa9
-SHA1: b21d6ce47cb471c73fb4ec07a24c6f4e56fd19fc
-SHA256: 89e7d5f61a0e3d32ef9aebd4b16e61840cd97e10196dfa186b06b6cde2f900a2
-Homepage: https://wiki.gnome.org/Apps/MockTester
-Description: Testing Package
-Task: ubuntu-desktop
-Description-md5: e7f99df3aa92cf870d335784e155ec33
-"""
-
-apt_cache_mocktester_all_arch = """
-Package: mocktester
-Architecture: all
-Version: 1:1.2.3-4
-Priority: optional
-Section: test
-Origin: Ubuntu
-Maintainer: Ubuntu Developers <ubuntu-devel-discuss@lists.ubuntu.com>
-Original-Maintainer: Debian GNOME Maintainers <pkg-gnome-maintainers@lists.alioth.debian.org>
-Bugs: https://bugs.launchpad.net/ubuntu/+filebug
-Installed-Size: 1234
-Depends: vim-common
-Recommends: zsh
-Suggests: foobar
-Filename: pool/main/m/mocktester/mocktester_1:1.2.3-4_amd64.deb
-Size: 65536
-MD5sum: a87e414ad5aede7c820ce4c4e6bc7fa9
-SHA1: b21d6ce47cb471c73fb4ec07a24c6f4e56fd19fc
-SHA256: 89e7d5f61a0e3d32ef9aebd4b16e61840cd97e10196dfa186b06b6cde2f900a2
-Homepage: https://wiki.gnome.org/Apps/MockTester
-Description: Testing Package
-Task: ubuntu-desktop
-Description-md5: e7f99df3aa92cf870d335784e155ec33
-"""
-
-apt_cache_mocktester_multi = """
-Package: mocktester
-Architecture: amd64
-Version: 1:1.2.3-4
-Priority: optional
-Section: test
-Origin: Ubuntu
-Maintainer: Ubuntu Developers <ubuntu-devel-discuss@lists.ubuntu.com>
-Original-Maintainer: Debian GNOME Maintainers <pkg-gnome-maintainers@lists.alioth.debian.org>
-Bugs: https://bugs.launchpad.net/ubuntu/+filebug
-Installed-Size: 1234
-Depends: vim-common
-Recommends: zsh
-Suggests: foobar
-Filename: pool/main/m/mocktester/mocktester_1:1.2.3-4_amd64.deb
-Size: 65536
-MD5sum: a87e414ad5aede7c820ce4c4e6bc7fa9
-SHA1: b21d6ce47cb471c73fb4ec07a24c6f4e56fd19fc
-SHA256: 89e7d5f61a0e3d32ef9aebd4b16e61840cd97e10196dfa186b06b6cde2f900a2
-Homepage: https://wiki.gnome.org/Apps/MockTester
-Description: Testing Package
-Task: ubuntu-desktop
-Description-md5: e7f99df3aa92cf870d335784e155ec33
-
-Package: mocktester
-Architecture: i386
-Version: 1:1.2.3-4
-Priority: optional
-Section: test
-Origin: Ubuntu
-Maintainer: Ubuntu Developers <ubuntu-devel-discuss@lists.ubuntu.com>
-Original-Maintainer: Debian GNOME Maintainers <pkg-gnome-maintainers@lists.alioth.debian.org>
-Bugs: https://bugs.launchpad.net/ubuntu/+filebug
-Installed-Size: 1234
-Depends: vim-common
-Recommends: zsh
-Suggests: foobar
-Filename: pool/main/m/mocktester/mocktester_1:1.2.3-4_amd64.deb
-Size: 65536
-MD5sum: a87e414ad5aede7c820ce4c4e6bc7fa9
-SHA1: b21d6ce47cb471c73fb4ec07a24c6f4e56fd19fc
-SHA256: 89e7d5f61a0e3d32ef9aebd4b16e61840cd97e10196dfa186b06b6cde2f900a2
-Homepage: https://wiki.gnome.org/Apps/MockTester
-Description: Testing Package
-Task: ubuntu-desktop
-Description-md5: e7f99df3aa92cf870d335784e155ec33
-"""
-
-apt_cache_aisleriot = """
-Package: aisleriot
-Architecture: amd64
-Version: 1:3.22.9-1
-Priority: optional
-Section: games
-Origin: Ubuntu
-Maintainer: Ubuntu Developers <ubuntu-devel-discuss@lists.ubuntu.com>
-Original-Maintainer: Debian GNOME Maintainers <pkg-gnome-maintainers@lists.alioth.debian.org>
-Bugs: https://bugs.launchpad.net/ubuntu/+filebug
-Installed-Size: 8800
-Depends: dconf-gsettings-backend | gsettings-backend, guile-2.2-libs, libatk1.0-0 (>= 1.12.4), libc6 (>= 2.14), libcairo2 (>= 1.10.0), libcanberra-gtk3-0 (>= 0.25), libcanberra0 (>= 0.2), libgdk-pixbuf2.0-0 (>= 2.22.0), libglib2.0-0 (>= 2
-.37.3), libgtk-3-0 (>= 3.19.12), librsvg2-2 (>= 2.32.0)
-Recommends: yelp
-Suggests: gnome-cards-data
-Filename: pool/main/a/aisleriot/aisleriot_3.22.9-1_amd64.deb
-Size: 843864
-MD5sum: a87e414ad5aede7c820ce4c4e6bc7fa9
-SHA1: b21d6ce47cb471c73fb4ec07a24c6f4e56fd19fc
-SHA256: 89e7d5f61a0e3d32ef9aebd4b16e61840cd97e10196dfa186b06b6cde2f900a2
-Homepage: https://wiki.gnome.org/Apps/Aisleriot
-Description: GNOME solitaire card game collection
-Task: ubuntu-desktop, ubuntukylin-desktop, ubuntu-budgie-desktop
-Description-md5: e7f99df3aa92cf870d335784e155ec33
-"""
-
-
-class TestApt(unittest.TestCase):
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    def test_can_load_from_dpkg(self, mock_subprocess):
-        mock_subprocess.side_effect = ["amd64", dpkg_output_vim]
-
-        vim = apt.DebianPackage.from_installed_package("vim")
-        self.assertEqual(vim.epoch, "2")
-        self.assertEqual(vim.arch, "amd64")
-        self.assertEqual(vim.fullversion, "2:8.1.2269-1ubuntu5.amd64")
-        self.assertEqual(str(vim.version), "2:8.1.2269-1ubuntu5")
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    def test_can_load_from_dpkg_with_version(self, mock_subprocess):
-        mock_subprocess.side_effect = ["amd64", dpkg_output_zsh]
-
-        zsh = apt.DebianPackage.from_installed_package("zsh", version="5.8-3ubuntu1")
-        self.assertEqual(zsh.epoch, "")
-        self.assertEqual(zsh.arch, "amd64")
-        self.assertEqual(zsh.fullversion, "5.8-3ubuntu1.amd64")
-        self.assertEqual(str(zsh.version), "5.8-3ubuntu1")
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    def test_will_not_load_from_system_with_bad_version(self, mock_subprocess):
-        mock_subprocess.side_effect = ["amd64", dpkg_output_zsh]
-
-        with self.assertRaises(apt.PackageNotFoundError):
-            apt.DebianPackage.from_installed_package("zsh", version="1.2-3")
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    def test_can_load_from_dpkg_with_arch(self, mock_subprocess):
-        mock_subprocess.side_effect = ["amd64", dpkg_output_zsh]
-
-        zsh = apt.DebianPackage.from_installed_package("zsh", arch="amd64")
-        self.assertEqual(zsh.epoch, "")
-        self.assertEqual(zsh.arch, "amd64")
-        self.assertEqual(zsh.fullversion, "5.8-3ubuntu1.amd64")
-        self.assertEqual(str(zsh.version), "5.8-3ubuntu1")
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    def test_can_load_from_dpkg_with_all_arch(self, mock_subprocess):
-        mock_subprocess.side_effect = ["amd64", dpkg_output_all_arch]
-
-        postgresql = apt.DebianPackage.from_installed_package("postgresql")
-        self.assertEqual(postgresql.epoch, "")
-        self.assertEqual(postgresql.arch, "all")
-        self.assertEqual(postgresql.fullversion, "12+214ubuntu0.1.all")
-        self.assertEqual(str(postgresql.version), "12+214ubuntu0.1")
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    def test_can_load_from_dpkg_multi_arch(self, mock_subprocess):
-        mock_subprocess.side_effect = ["amd64", dpkg_output_multi_arch]
-
-        vim = apt.DebianPackage.from_installed_package("vim", arch="i386")
-        self.assertEqual(vim.epoch, "2")
-        self.assertEqual(vim.arch, "i386")
-        self.assertEqual(vim.fullversion, "2:8.1.2269-1ubuntu5.i386")
-        self.assertEqual(str(vim.version), "2:8.1.2269-1ubuntu5")
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    def test_can_load_from_dpkg_not_installed(self, mock_subprocess):
-        mock_subprocess.side_effect = ["amd64", dpkg_output_not_installed]
-
-        with self.assertRaises(apt.PackageNotFoundError) as ctx:
-            apt.DebianPackage.from_installed_package("ubuntu-advantage-tools")
-
-        self.assertEqual(
-            "<charms.operator_libs_linux.v0.apt.PackageNotFoundError>", ctx.exception.name
-        )
-        self.assertIn(
-            "Package ubuntu-advantage-tools.amd64 is not installed!", ctx.exception.message
-        )
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    def test_can_load_from_apt_cache(self, mock_subprocess):
-        mock_subprocess.side_effect = ["amd64", apt_cache_mocktester]
-
-        tester = apt.DebianPackage.from_apt_cache("mocktester")
-        self.assertEqual(tester.epoch, "1")
-        self.assertEqual(tester.arch, "amd64")
-        self.assertEqual(tester.fullversion, "1:1.2.3-4.amd64")
-        self.assertEqual(str(tester.version), "1:1.2.3-4")
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    def test_can_load_from_apt_cache_all_arch(self, mock_subprocess):
-        mock_subprocess.side_effect = ["amd64", apt_cache_mocktester_all_arch]
-
-        tester = apt.DebianPackage.from_apt_cache("mocktester")
-        self.assertEqual(tester.epoch, "1")
-        self.assertEqual(tester.arch, "all")
-        self.assertEqual(tester.fullversion, "1:1.2.3-4.all")
-        self.assertEqual(str(tester.version), "1:1.2.3-4")
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    def test_can_load_from_apt_cache_multi_arch(self, mock_subprocess):
-        mock_subprocess.side_effect = ["amd64", apt_cache_mocktester_multi]
-
-        tester = apt.DebianPackage.from_apt_cache("mocktester", arch="i386")
-        self.assertEqual(tester.epoch, "1")
-        self.assertEqual(tester.arch, "i386")
-        self.assertEqual(tester.fullversion, "1:1.2.3-4.i386")
-        self.assertEqual(str(tester.version), "1:1.2.3-4")
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    def test_will_throw_apt_cache_errors(self, mock_subprocess):
-        mock_subprocess.side_effect = [
-            "amd64",
-            subprocess.CalledProcessError(
-                returncode=100,
-                cmd=["apt-cache", "show", "mocktester"],
-                stderr="N: Unable to locate package mocktester",
-            ),
-        ]
-
-        with self.assertRaises(apt.PackageError) as ctx:
-            apt.DebianPackage.from_apt_cache("mocktester", arch="i386")
-
-        self.assertEqual("<charms.operator_libs_linux.v0.apt.PackageError>", ctx.exception.name)
-        self.assertIn("Could not list packages in apt-cache", ctx.exception.message)
-        self.assertIn("Unable to locate package", ctx.exception.message)
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    @patch("charms.operator_libs_linux.v0.apt.subprocess.run")
-    @patch("os.environ.copy")
-    def test_can_run_apt_commands(
-        self, mock_environ, mock_subprocess_call, mock_subprocess_output
-    ):
-        mock_subprocess_call.return_value = 0
-        mock_subprocess_output.side_effect = [
-            "amd64",
-            subprocess.CalledProcessError(returncode=100, cmd=["dpkg", "-l", "mocktester"]),
-            "amd64",
-            apt_cache_mocktester,
-        ]
-        mock_environ.return_value = {"PING": "PONG"}
-
-        pkg = apt.DebianPackage.from_system("mocktester")
-        self.assertEqual(pkg.present, False)
-        self.assertEqual(pkg.version.epoch, "1")
-        self.assertEqual(pkg.version.number, "1.2.3-4")
+OUTPUT_DIR = Path(__file__).parent / "data" / "package-output"
 
+dpkg_output_zsh = (OUTPUT_DIR / "zsh.dpkg-l").read_text()
+dpkg_output_vim = (OUTPUT_DIR / "vim.dpkg-l").read_text()
+dpkg_output_all_arch = (OUTPUT_DIR / "postgresql.dpkg-l").read_text()
+dpkg_output_multi_arch = (OUTPUT_DIR / "vim-multi-arch.dpkg-l").read_text()
+dpkg_output_arch_qualified = (OUTPUT_DIR / "libc6.dpkg-l").read_text()
+dpkg_output_not_installed = (OUTPUT_DIR / "ubuntu-advantage-tools.dpkg-l").read_text()
+apt_cache_mocktester = (OUTPUT_DIR / "mocktester.apt-cache").read_text()
+apt_cache_aisleriot = (OUTPUT_DIR / "aisleriot.apt-cache").read_text()
+
+
+def apt_cache_mocktester_for(*archs):
+    """Return the mocktester record once for each of the given architectures."""
+    return "".join(
+        apt_cache_mocktester.replace("Architecture: amd64", f"Architecture: {arch}")
+        for arch in archs
+    )
+
+
+apt_cache_mocktester_all_arch = apt_cache_mocktester_for("all")
+apt_cache_mocktester_multi = apt_cache_mocktester_for("amd64", "i386")
+
+
+# Response for a command that exits like dpkg and apt-cache do for an unknown package.
+NOT_FOUND = object()
+
+
+class FakeCheckOutput:
+    """Stand-in for `check_output` that answers based on the command it is given.
+
+    Responses are keyed by the space-joined command line. A response is either the output
+    to return, an exception to raise, `NOT_FOUND`, or a list of those to use in turn, the
+    last of which is repeated.
+    """
+
+    def __init__(self, responses):
+        self.responses = {
+            cmd: list(response) if isinstance(response, list) else [response]
+            for cmd, response in responses.items()
+        }
+
+    def __call__(self, args, *_, **__):
+        responses = self.responses[" ".join(args)]
+        response = responses.pop(0) if len(responses) > 1 else responses[0]
+        if response is NOT_FOUND:
+            raise subprocess.CalledProcessError(returncode=100, cmd=args)
+        if isinstance(response, BaseException):
+            raise response
+        return response
+
+
+@pytest.fixture(autouse=True)
+def apt_mocks():
+    """Replace every way the apt library shells out, for the duration of each test."""
+    with patch.multiple(apt, check_output=DEFAULT, _get_system_arch=DEFAULT) as mocks:
+        with patch.object(apt.subprocess, "run", return_value=0) as run:
+            mocks["_get_system_arch"].return_value = "amd64"
+            mocks["run"] = run
+            yield mocks
+
+
+@pytest.fixture
+def check_output(apt_mocks):
+    return apt_mocks["check_output"]
+
+
+@pytest.fixture
+def run(apt_mocks):
+    return apt_mocks["run"]
+
+
+@pytest.fixture
+def environ():
+    # Not patch.dict: pytest writes PYTEST_CURRENT_TEST into os.environ as each test runs.
+    with patch.object(apt.os.environ, "copy", return_value={}) as mock:
+        yield mock
+
+
+@pytest.mark.parametrize(
+    "package, kwargs, output, epoch, arch, version",
+    [
+        ("vim", {}, dpkg_output_vim, "2", "amd64", "2:8.1.2269-1ubuntu5"),
+        ("zsh", {"version": "5.8-3ubuntu1"}, dpkg_output_zsh, "", "amd64", "5.8-3ubuntu1"),
+        ("zsh", {"arch": "amd64"}, dpkg_output_zsh, "", "amd64", "5.8-3ubuntu1"),
+        ("postgresql", {}, dpkg_output_all_arch, "", "all", "12+214ubuntu0.1"),
+        ("vim", {"arch": "i386"}, dpkg_output_multi_arch, "2", "i386", "2:8.1.2269-1ubuntu5"),
+        ("libc6", {"arch": "i386"}, dpkg_output_arch_qualified, "", "i386", "2.31-0ubuntu9.9"),
+    ],
+    ids=["default", "with-version", "with-arch", "all-arch", "multi-arch", "arch-qualified"],
+)
+def test_can_load_from_dpkg(check_output, package, kwargs, output, epoch, arch, version):
+    check_output.side_effect = FakeCheckOutput({f"dpkg -l {package}": output})
+
+    pkg = apt.DebianPackage.from_installed_package(package, **kwargs)
+    assert pkg.name == package
+    assert pkg.epoch == epoch
+    assert pkg.arch == arch
+    assert pkg.fullversion == f"{version}.{arch}"
+    assert str(pkg.version) == version
+
+
+def test_will_not_load_from_system_with_bad_version(check_output):
+    check_output.side_effect = FakeCheckOutput({"dpkg -l zsh": dpkg_output_zsh})
+
+    with pytest.raises(apt.PackageNotFoundError):
+        apt.DebianPackage.from_installed_package("zsh", version="1.2-3")
+
+
+def test_can_load_from_dpkg_not_installed(check_output):
+    check_output.side_effect = FakeCheckOutput({
+        "dpkg -l ubuntu-advantage-tools": dpkg_output_not_installed
+    })
+
+    with pytest.raises(apt.PackageNotFoundError) as ctx:
+        apt.DebianPackage.from_installed_package("ubuntu-advantage-tools")
+
+    assert ctx.value.name == "<charms.operator_libs_linux.v0.apt.PackageNotFoundError>"
+    assert "Package ubuntu-advantage-tools.amd64 is not installed!" in ctx.value.message
+
+
+@pytest.mark.parametrize(
+    "kwargs, output, arch",
+    [
+        ({}, apt_cache_mocktester, "amd64"),
+        ({}, apt_cache_mocktester_all_arch, "all"),
+        ({"arch": "i386"}, apt_cache_mocktester_multi, "i386"),
+    ],
+    ids=["default", "all-arch", "multi-arch"],
+)
+def test_can_load_from_apt_cache(check_output, kwargs, output, arch):
+    check_output.side_effect = FakeCheckOutput({"apt-cache show mocktester": output})
+
+    tester = apt.DebianPackage.from_apt_cache("mocktester", **kwargs)
+    assert tester.epoch == "1"
+    assert tester.arch == arch
+    assert tester.fullversion == f"1:1.2.3-4.{arch}"
+    assert str(tester.version) == "1:1.2.3-4"
+
+
+def test_will_not_load_from_empty_apt_cache(check_output):
+    check_output.side_effect = FakeCheckOutput({"apt-cache show mocktester": "\n"})
+
+    with pytest.raises(apt.PackageNotFoundError):
+        apt.DebianPackage.from_apt_cache("mocktester")
+
+
+def test_will_throw_apt_cache_errors(check_output):
+    check_output.side_effect = FakeCheckOutput({
+        "apt-cache show mocktester": subprocess.CalledProcessError(
+            returncode=100,
+            cmd=["apt-cache", "show", "mocktester"],
+            stderr="N: Unable to locate package mocktester",
+        ),
+    })
+
+    with pytest.raises(apt.PackageError) as ctx:
+        apt.DebianPackage.from_apt_cache("mocktester", arch="i386")
+
+    assert ctx.value.name == "<charms.operator_libs_linux.v0.apt.PackageError>"
+    assert "Could not list packages in apt-cache" in ctx.value.message
+    assert "Unable to locate package" in ctx.value.message
+
+
+def test_can_run_apt_commands(check_output, run, environ):
+    check_output.side_effect = FakeCheckOutput({
+        "dpkg -l mocktester": NOT_FOUND,
+        "apt-cache show mocktester": apt_cache_mocktester,
+    })
+    environ.return_value = {"PING": "PONG"}
+
+    pkg = apt.DebianPackage.from_system("mocktester")
+    assert not pkg.present
+    assert pkg.version.epoch == "1"
+    assert pkg.version.number == "1.2.3-4"
+
+    pkg.ensure(apt.PackageState.Latest)
+    run.assert_called_with(
+        [
+            "apt-get",
+            "-y",
+            "--option=Dpkg::Options::=--force-confold",
+            "install",
+            "mocktester=1:1.2.3-4",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+        env={"DEBIAN_FRONTEND": "noninteractive", "PING": "PONG"},
+    )
+    assert pkg.state == apt.PackageState.Latest
+
+    pkg.state = apt.PackageState.Absent
+    run.assert_called_with(
+        ["apt-get", "-y", "remove", "mocktester=1:1.2.3-4"],
+        capture_output=True,
+        check=True,
+        text=True,
+        env={"DEBIAN_FRONTEND": "noninteractive", "PING": "PONG"},
+    )
+
+
+def test_will_throw_apt_errors(check_output, run):
+    run.side_effect = subprocess.CalledProcessError(
+        returncode=1,
+        cmd=["apt-get", "-y", "install"],
+        stderr="E: Unable to locate package mocktester",
+    )
+    check_output.side_effect = FakeCheckOutput({
+        "dpkg -l mocktester": NOT_FOUND,
+        "apt-cache show mocktester": apt_cache_mocktester,
+    })
+
+    pkg = apt.DebianPackage.from_system("mocktester")
+    assert not pkg.present
+
+    with pytest.raises(apt.PackageError) as ctx:
         pkg.ensure(apt.PackageState.Latest)
-        mock_subprocess_call.assert_called_with(
-            [
-                "apt-get",
-                "-y",
-                "--option=Dpkg::Options::=--force-confold",
-                "install",
-                "mocktester=1:1.2.3-4",
-            ],
-            capture_output=True,
-            check=True,
-            text=True,
-            env={"DEBIAN_FRONTEND": "noninteractive", "PING": "PONG"},
-        )
-        self.assertEqual(pkg.state, apt.PackageState.Latest)
-
-        pkg.state = apt.PackageState.Absent
-        mock_subprocess_call.assert_called_with(
-            ["apt-get", "-y", "remove", "mocktester=1:1.2.3-4"],
-            capture_output=True,
-            check=True,
-            text=True,
-            env={"DEBIAN_FRONTEND": "noninteractive", "PING": "PONG"},
-        )
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    @patch("charms.operator_libs_linux.v0.apt.subprocess.run")
-    def test_will_throw_apt_errors(self, mock_subprocess_call, mock_subprocess_output):
-        mock_subprocess_call.side_effect = subprocess.CalledProcessError(
-            returncode=1,
-            cmd=["apt-get", "-y", "install"],
-            stderr="E: Unable to locate package mocktester",
-        )
-        mock_subprocess_output.side_effect = [
-            "amd64",
-            subprocess.CalledProcessError(returncode=100, cmd=["dpkg", "-l", "mocktester"]),
-            "amd64",
-            apt_cache_mocktester,
-        ]
-
-        pkg = apt.DebianPackage.from_system("mocktester")
-        self.assertEqual(pkg.present, False)
-
-        with self.assertRaises(apt.PackageError) as ctx:
-            pkg.ensure(apt.PackageState.Latest)
-
-        self.assertEqual("<charms.operator_libs_linux.v0.apt.PackageError>", ctx.exception.name)
-        self.assertIn("Could not install package", ctx.exception.message)
-        self.assertIn("Unable to locate package", ctx.exception.message)
-
-    def test_can_compare_versions(self):
-        old_version = apt.Version("1.0.0", "")
-        old_dupe = apt.Version("1.0.0", "")
-        new_version = apt.Version("1.0.1", "")
-        new_epoch = apt.Version("1.0.1", "1")
-
-        self.assertEqual(old_version, old_dupe)
-        self.assertGreater(new_version, old_version)
-        self.assertGreater(new_epoch, new_version)
-        self.assertLess(old_version, new_version)
-        self.assertLessEqual(new_version, new_epoch)
-        self.assertGreaterEqual(new_version, old_version)
-        self.assertNotEqual(new_version, old_version)
-
-    def test_can_parse_epoch_and_version(self):
-        self.assertEqual((None, "1.0.0"), apt.DebianPackage._get_epoch_from_version("1.0.0"))
-        self.assertEqual(
-            ("2", "9.8-7ubuntu6"), apt.DebianPackage._get_epoch_from_version("2:9.8-7ubuntu6")
-        )
-
-
-class TestAptBareMethods(unittest.TestCase):
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    @patch("charms.operator_libs_linux.v0.apt.subprocess.run")
-    @patch("os.environ.copy")
-    def test_can_run_bare_changes_on_single_package(
-        self, mock_environ, mock_subprocess, mock_subprocess_output
-    ):
-        mock_subprocess.return_value = 0
-        mock_subprocess_output.side_effect = [
-            "amd64",
-            subprocess.CalledProcessError(returncode=100, cmd=["dpkg", "-l", "aisleriot"]),
-            "amd64",
-            apt_cache_aisleriot,
-        ]
-        mock_environ.return_value = {}
-
-        foo = apt.add_package("aisleriot")
-        mock_subprocess.assert_called_with(
-            [
-                "apt-get",
-                "-y",
-                "--option=Dpkg::Options::=--force-confold",
-                "install",
-                "aisleriot=1:3.22.9-1",
-            ],
-            capture_output=True,
-            check=True,
-            text=True,
-            env={"DEBIAN_FRONTEND": "noninteractive"},
-        )
-        self.assertEqual(foo.present, True)
-
-        mock_subprocess_output.side_effect = ["amd64", dpkg_output_zsh]
-        bar = apt.remove_package("zsh")
-        bar.ensure(apt.PackageState.Absent)
-        mock_subprocess.assert_called_with(
-            ["apt-get", "-y", "remove", "zsh=5.8-3ubuntu1"],
-            capture_output=True,
-            check=True,
-            text=True,
-            env={"DEBIAN_FRONTEND": "noninteractive"},
-        )
-        self.assertEqual(bar.present, False)
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    @patch("charms.operator_libs_linux.v0.apt.subprocess.run")
-    @patch("os.environ.copy")
-    def test_can_run_bare_changes_on_multiple_packages(
-        self, mock_environ, mock_subprocess, mock_subprocess_output
-    ):
-        mock_subprocess.return_value = 0
-        mock_subprocess_output.side_effect = [
-            "amd64",
-            subprocess.CalledProcessError(returncode=100, cmd=["dpkg", "-l", "aisleriot"]),
-            "amd64",
-            apt_cache_aisleriot,
-            "amd64",
-            subprocess.CalledProcessError(returncode=100, cmd=["dpkg", "-l", "mocktester"]),
-            "amd64",
-            apt_cache_mocktester,
-        ]
-        mock_environ.return_value = {}
-
-        foo = apt.add_package(["aisleriot", "mocktester"])
-        mock_subprocess.assert_any_call(
-            [
-                "apt-get",
-                "-y",
-                "--option=Dpkg::Options::=--force-confold",
-                "install",
-                "aisleriot=1:3.22.9-1",
-            ],
-            capture_output=True,
-            check=True,
-            text=True,
-            env={"DEBIAN_FRONTEND": "noninteractive"},
-        )
-        mock_subprocess.assert_any_call(
-            [
-                "apt-get",
-                "-y",
-                "--option=Dpkg::Options::=--force-confold",
-                "install",
-                "mocktester=1:1.2.3-4",
-            ],
-            capture_output=True,
-            check=True,
-            text=True,
-            env={"DEBIAN_FRONTEND": "noninteractive"},
-        )
-        self.assertEqual(foo[0].present, True)
-        self.assertEqual(foo[1].present, True)
-
-        mock_subprocess_output.side_effect = ["amd64", dpkg_output_vim, "amd64", dpkg_output_zsh]
-        bar = apt.remove_package(["vim", "zsh"])
-        mock_subprocess.assert_any_call(
-            ["apt-get", "-y", "remove", "vim=2:8.1.2269-1ubuntu5"],
-            capture_output=True,
-            check=True,
-            text=True,
-            env={"DEBIAN_FRONTEND": "noninteractive"},
-        )
-        mock_subprocess.assert_any_call(
-            ["apt-get", "-y", "remove", "zsh=5.8-3ubuntu1"],
-            capture_output=True,
-            check=True,
-            text=True,
-            env={"DEBIAN_FRONTEND": "noninteractive"},
-        )
-        self.assertEqual(bar[0].present, False)
-        self.assertEqual(bar[1].present, False)
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    @patch("charms.operator_libs_linux.v0.apt.subprocess.run")
-    def test_refreshes_apt_cache_if_not_found(self, mock_subprocess, mock_subprocess_output):
-        mock_subprocess.return_value = 0
-        mock_subprocess_output.side_effect = [
-            "amd64",
-            subprocess.CalledProcessError(returncode=100, cmd=["dpkg", "-l", "nothere"]),
-            "amd64",
-            subprocess.CalledProcessError(returncode=100, cmd=["apt-cache", "show", "nothere"]),
-            "amd64",
-            subprocess.CalledProcessError(returncode=100, cmd=["dpkg", "-l", "nothere"]),
-            "amd64",
+
+    assert ctx.value.name == "<charms.operator_libs_linux.v0.apt.PackageError>"
+    assert "Could not install package" in ctx.value.message
+    assert "Unable to locate package" in ctx.value.message
+
+
+def test_repr_does_not_depend_on_cached_fullversion():
+    pkg = apt.DebianPackage("vim", "8.1.2269-1ubuntu5", "2", "amd64", apt.PackageState.Present)
+    before = repr(pkg)
+    assert pkg.fullversion == "2:8.1.2269-1ubuntu5.amd64"
+    assert repr(pkg) == before
+    assert "_fullversion" not in before
+
+
+def test_can_compare_versions():
+    old_version = apt.Version("1.0.0", "")
+    old_dupe = apt.Version("1.0.0", "")
+    new_version = apt.Version("1.0.1", "")
+    new_epoch = apt.Version("1.0.1", "1")
+
+    assert old_version == old_dupe
+    assert new_version > old_version
+    assert new_epoch > new_version
+    assert old_version < new_version
+    assert new_version <= new_epoch
+    assert new_version >= old_version
+    assert new_version != old_version
+
+
+@pytest.mark.parametrize(
+    "version, expected",
+    [
+        ("1.0.0", (None, "1.0.0")),
+        ("2:9.8-7ubuntu6", ("2", "9.8-7ubuntu6")),
+        ("9.8-7ubuntu6:a", (None, "9.8-7ubuntu6:a")),
+    ],
+)
+def test_can_parse_epoch_and_version(version, expected):
+    assert apt.DebianPackage._get_epoch_from_version(version) == expected
+
+
+def test_can_add_single_package(check_output, run, environ):
+    check_output.side_effect = FakeCheckOutput({
+        "dpkg -l aisleriot": NOT_FOUND,
+        "apt-cache show aisleriot": apt_cache_aisleriot,
+    })
+
+    foo = apt.add_package("aisleriot")
+    run.assert_called_with(
+        [
+            "apt-get",
+            "-y",
+            "--option=Dpkg::Options::=--force-confold",
+            "install",
+            "aisleriot=1:3.22.9-1",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+        env={"DEBIAN_FRONTEND": "noninteractive"},
+    )
+    assert foo.present
+
+
+def test_can_remove_single_package(check_output, run, environ):
+    check_output.side_effect = FakeCheckOutput({"dpkg -l zsh": dpkg_output_zsh})
+    bar = apt.remove_package("zsh")
+    bar.ensure(apt.PackageState.Absent)
+    run.assert_called_with(
+        ["apt-get", "-y", "remove", "zsh=5.8-3ubuntu1"],
+        capture_output=True,
+        check=True,
+        text=True,
+        env={"DEBIAN_FRONTEND": "noninteractive"},
+    )
+    assert not bar.present
+
+
+def test_can_add_multiple_packages(check_output, run, environ):
+    check_output.side_effect = FakeCheckOutput({
+        "dpkg -l aisleriot": NOT_FOUND,
+        "apt-cache show aisleriot": apt_cache_aisleriot,
+        "dpkg -l mocktester": NOT_FOUND,
+        "apt-cache show mocktester": apt_cache_mocktester,
+    })
+
+    foo = apt.add_package(["aisleriot", "mocktester"])
+    run.assert_called_once_with(
+        [
+            "apt-get",
+            "-y",
+            "--option=Dpkg::Options::=--force-confold",
+            "install",
+            "aisleriot=1:3.22.9-1",
+            "mocktester=1:1.2.3-4",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+        env={"DEBIAN_FRONTEND": "noninteractive"},
+    )
+    assert foo[0].present
+    assert foo[1].present
+
+
+def test_can_remove_multiple_packages(check_output, run, environ):
+    check_output.side_effect = FakeCheckOutput({
+        "dpkg -l vim": dpkg_output_vim,
+        "dpkg -l zsh": dpkg_output_zsh,
+    })
+    bar = apt.remove_package(["vim", "zsh"])
+    run.assert_any_call(
+        ["apt-get", "-y", "remove", "vim=2:8.1.2269-1ubuntu5"],
+        capture_output=True,
+        check=True,
+        text=True,
+        env={"DEBIAN_FRONTEND": "noninteractive"},
+    )
+    run.assert_any_call(
+        ["apt-get", "-y", "remove", "zsh=5.8-3ubuntu1"],
+        capture_output=True,
+        check=True,
+        text=True,
+        env={"DEBIAN_FRONTEND": "noninteractive"},
+    )
+    assert not bar[0].present
+    assert not bar[1].present
+
+
+def test_refreshes_apt_cache_if_not_found(check_output, run):
+    check_output.side_effect = FakeCheckOutput({
+        "dpkg -l aisleriot": NOT_FOUND,
+        # Only found once the cache has been updated.
+        "apt-cache show aisleriot": [
+            NOT_FOUND,
             apt_cache_aisleriot,
-        ]
-        pkg = apt.add_package("aisleriot")
-        mock_subprocess.assert_any_call(
-            ["apt-get", "update", "--error-on=any"], capture_output=True, check=True
-        )
-        self.assertEqual(pkg.name, "aisleriot")
-        self.assertEqual(pkg.present, True)
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    @patch("charms.operator_libs_linux.v0.apt.subprocess.run")
-    def test_raises_package_not_found_error(self, mock_subprocess, mock_subprocess_output):
-        mock_subprocess.return_value = 0
-        mock_subprocess_output.side_effect = [
-            "amd64",
-            subprocess.CalledProcessError(returncode=100, cmd=["dpkg", "-l", "nothere"]),
-            "amd64",
-            subprocess.CalledProcessError(returncode=100, cmd=["apt-cache", "show", "nothere"]),
-        ] * 2  # Double up for the retry after update
-        with self.assertRaises(apt.PackageError) as ctx:
-            apt.add_package("nothere")
-        mock_subprocess.assert_any_call(
-            ["apt-get", "update", "--error-on=any"], capture_output=True, check=True
-        )
-        self.assertEqual("<charms.operator_libs_linux.v0.apt.PackageError>", ctx.exception.name)
-        self.assertIn("Failed to install packages: nothere", ctx.exception.message)
-
-    @patch("charms.operator_libs_linux.v0.apt.check_output")
-    @patch("charms.operator_libs_linux.v0.apt.subprocess.run")
-    def test_remove_package_not_installed(self, mock_subprocess, mock_subprocess_output):
-        mock_subprocess_output.side_effect = ["amd64", dpkg_output_not_installed]
-
-        packages = apt.remove_package("ubuntu-advantage-tools")
-        mock_subprocess.assert_not_called()
-        self.assertEqual(packages, [])
+        ],
+    })
+    pkg = apt.add_package("aisleriot")
+    run.assert_any_call(["apt-get", "update", "--error-on=any"], capture_output=True, check=True)
+    assert pkg.name == "aisleriot"
+    assert pkg.present
+
+
+def test_raises_package_not_found_error(check_output, run):
+    check_output.side_effect = FakeCheckOutput({
+        "dpkg -l nothere": NOT_FOUND,
+        "apt-cache show nothere": NOT_FOUND,
+    })
+    with pytest.raises(apt.PackageError) as ctx:
+        apt.add_package("nothere")
+    run.assert_any_call(["apt-get", "update", "--error-on=any"], capture_output=True, check=True)
+    assert ctx.value.name == "<charms.operator_libs_linux.v0.apt.PackageError>"
+    assert "Failed to install packages: nothere" in ctx.value.message
+
+
+def test_add_package_skips_installed_packages(check_output, run, environ):
+    check_output.side_effect = FakeCheckOutput({
+        "dpkg -l zsh": dpkg_output_zsh,
+        "dpkg -l mocktester": NOT_FOUND,
+        "apt-cache show mocktester": apt_cache_mocktester,
+    })
+
+    zsh, tester = apt.add_package(["zsh", "mocktester"])
+    run.assert_called_once_with(
+        [
+            "apt-get",
+            "-y",
+            "--option=Dpkg::Options::=--force-confold",
+            "install",
+            "mocktester=1:1.2.3-4",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+        env={"DEBIAN_FRONTEND": "noninteractive"},
+    )
+    assert zsh.present
+    assert tester.present
+
+
+def test_raises_if_not_found_after_requested_update(check_output, run):
+    check_output.side_effect = FakeCheckOutput({
+        "dpkg -l nothere": NOT_FOUND,
+        "apt-cache show nothere": NOT_FOUND,
+    })
+    with pytest.raises(apt.PackageError) as ctx:
+        apt.add_package("nothere", update_cache=True)
+    run.assert_called_once_with(
+        ["apt-get", "update", "--error-on=any"], capture_output=True, check=True
+    )
+    assert "Failed to install packages: nothere" in ctx.value.message
+
+
+def test_remove_package_not_installed(check_output, run):
+    check_output.side_effect = FakeCheckOutput({
+        "dpkg -l ubuntu-advantage-tools": dpkg_output_not_installed
+    })
+
+    packages = apt.remove_package("ubuntu-advantage-tools")
+    run.assert_not_called()
+    assert packages == []
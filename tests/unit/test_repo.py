@@ -1,6 +1,10 @@
 # Copyright 2021 Canonical Ltd.
 # See LICENSE file for licensing details.
 
+import os
+import stat
+from unittest.mock import patch
+
 from charms.operator_libs_linux.v0 import apt
 from pyfakefs.fake_filesystem_unittest import TestCase
 
@@ -86,6 +90,36 @@ class TestRepositoryMapping(TestCase):
             open(other.filename).readlines(),
         )
 
+    def test_disable_only_rewrites_matching_lines(self):
+        os.chmod("/etc/apt/sources.list", 0o644)
+        r = apt.RepositoryMapping()
+        r["deb-http://us.archive.ubuntu.com/ubuntu-focal"].disable()
+
+        with open("/etc/apt/sources.list") as f:
+            self.assertEqual(
+                f.read(),
+                sources_list.replace(
+                    "\ndeb http://us.archive.ubuntu.com/ubuntu focal ",
+                    "\n# deb http://us.archive.ubuntu.com/ubuntu focal ",
+                ),
+            )
+        self.assertEqual(stat.S_IMODE(os.stat("/etc/apt/sources.list").st_mode), 0o644)
+        self.assertEqual(
+            sorted(os.listdir("/etc/apt")), ["sources.list", "sources.list.d", "sources.list.list"]
+        )
+
+    def test_disable_removes_temporary_file_on_failure(self):
+        r = apt.RepositoryMapping()
+        with patch("os.replace", side_effect=OSError("boom")):
+            with self.assertRaises(OSError):
+                r["deb-http://us.archive.ubuntu.com/ubuntu-focal"].disable()
+
+        with open("/etc/apt/sources.list") as f:
+            self.assertEqual(f.read(), sources_list)
+        self.assertEqual(
+            sorted(os.listdir("/etc/apt")), ["sources.list", "sources.list.d", "sources.list.list"]
+        )
+
     def test_can_create_repo_from_repo_line(self):
         d = apt.DebianRepository.from_repo_line(
             "deb https://example.com/foo focal bar baz",
@@ -111,3 +145,13 @@ class TestRepositoryMapping(TestCase):
         self.assertEqual(d.filename, "/etc/apt/sources.list.d/foo-focal.list")
         self.assertEqual(d.gpg_key, "/foo/gpg.key")
         self.assertEqual(d.options["arch"], "amd64")
+
+    def test_repositories_from_the_same_string_are_independent(self):
+        line = "deb [arch=amd64] https://example.com/foo focal bar baz"
+        d = apt.DebianRepository.from_repo_line(line, write_file=False)
+        d.groups.append("qux")
+        d.options["arch"] = "arm64"
+
+        d = apt.DebianRepository.from_repo_line(line, write_file=False)
+        self.assertEqual(d.groups, ["bar", "baz"])
+        self.assertEqual(d.options, {"arch": "amd64"})
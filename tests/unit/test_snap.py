@@ -11,7 +11,7 @@ import typing
 import unittest
 from subprocess import CalledProcessError
 from typing import Any, Dict, Iterable, Optional
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import MagicMock, patch
 
 import fake_snapd as fake_snapd
 from charms.operator_libs_linux.v2 import snap
@@ -192,6 +192,11 @@ installed_result = r"""
 """
 
 
+def fake_open(read_data: str):
+    """Return a stand-in for `open` that gives each caller a fresh in-memory file."""
+    return lambda *_, **__: io.StringIO(read_data)
+
+
 class SnapCacheTester(snap.SnapCache):
     def __init__(self):
         # Fake out __init__ so we can test methods individually
@@ -238,11 +243,9 @@ class TestSnapCache(unittest.TestCase):
             snap.ensure(snap_names="curl", state="latest")
             self.assertIsInstance(snap._Cache.cache, snap.SnapCache)
 
-    @patch("builtins.open", new_callable=mock_open, read_data="foo\nbar\n  \n")
+    @patch("builtins.open", side_effect=fake_open("foo\nbar\n  \n"))
     @patch("os.path.isfile")
     def test_can_load_snap_cache(self, mock_exists, m):
-        m.return_value.__iter__ = lambda self: self
-        m.return_value.__next__ = lambda self: next(iter(self.readline, ""))
         mock_exists.return_value = True
         s = SnapCacheTester()
         s._load_available_snaps()
@@ -255,11 +258,9 @@ class TestSnapCache(unittest.TestCase):
         s._load_available_snaps()
         self.assertFalse(s._snap_map)  # pyright: ignore[reportUnknownMemberType]
 
-    @patch("builtins.open", new_callable=mock_open, read_data="curl\n")
+    @patch("builtins.open", side_effect=fake_open("curl\n"))
     @patch("os.path.isfile")
     def test_can_lazy_load_snap_info(self, mock_exists, m):
-        m.return_value.__iter__ = lambda self: self
-        m.return_value.__next__ = lambda self: next(iter(self.readline, ""))
         mock_exists.return_value = True
         s = SnapCacheTester()
         s._snap_client.get_snap_information.return_value = json.loads(lazy_load_result)["result"][
@@ -639,6 +640,16 @@ class TestSocketClient(unittest.TestCase):
         finally:
             shutdown()
 
+    def test_fake_socket_sections(self):
+        shutdown, socket_path = fake_snapd.start_server()
+
+        try:
+            client = snap.SnapClient(socket_path, base_url="http://localhost/v1/")
+            sections = client._request("GET", "sections")  # pyright: ignore[reportUnknownMemberType]
+            self.assertIn("featured", sections)  # pyright: ignore[reportUnknownArgumentType]
+        finally:
+            shutdown()
+
     @patch("builtins.hasattr", return_value=False)
     def test_not_implemented_raised_when_missing_socket_af_unix(self, _: MagicMock):
         """Assert NotImplementedError raised when missing socket.AF_UNIX."""
@@ -857,11 +868,9 @@ class TestSocketClient(unittest.TestCase):
 
 
 class TestSnapBareMethods(unittest.TestCase):
-    @patch("builtins.open", new_callable=mock_open, read_data="curl\n")
+    @patch("builtins.open", side_effect=fake_open("curl\n"))
     @patch("os.path.isfile")
     def setUp(self, mock_exists, m):
-        m.return_value.__iter__ = lambda self: self
-        m.return_value.__next__ = lambda self: next(iter(self.readline, ""))
         mock_exists.return_value = True
         snap._Cache.cache = SnapCacheTester()
         snap._Cache.cache._snap_client.get_installed_snaps.return_value = json.loads(